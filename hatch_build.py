@@ -0,0 +1,19 @@
+# Copyright © LFV
+"""Build hook that precompiles the Jinja templates to python modules and ships them in the wheel."""
+
+import os
+import sys
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+
+class CustomBuildHook(BuildHookInterface):
+    def initialize(self, version, build_data):
+        if self.target_name != "wheel":
+            return
+
+        sys.path.insert(0, os.path.join(self.root, "src"))
+        from openapi_to_asciidoc.render import compile_templates
+
+        compile_templates()
+        build_data["artifacts"].append("/src/openapi_to_asciidoc/compiled_templates/")
@@ -0,0 +1,126 @@
+# Copyright © LFV
+"""Conversion of many specifications in one run.
+
+The specifications are converted by a pool of worker processes, each with its own template environment that is
+ set up once and then used for every specification it converts. A specification that can't be converted doesn't
+ stop the others, its error is reported in the summary instead.
+"""
+
+from collections import Counter
+from functools import partial
+from pathlib import Path
+import glob
+from typing import Iterable, List, TextIO
+
+from openapi_to_asciidoc import convert, decoding, parallel
+from openapi_to_asciidoc.objects import OpenApi
+
+
+def read_manifest(path: str) -> List[str]:
+    """Returns the specifications listed in a manifest file, one per line. Empty lines and lines with # are skipped."""
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def expand_inputs(patterns: Iterable[str]) -> List[str]:
+    """
+    Expand the glob patterns among the inputs.
+
+    Returns:
+    - list: The files matching each pattern, in order, and every input that isn't a pattern as it is.
+    """
+    inputs = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            inputs += sorted(glob.glob(pattern, recursive=True))
+        else:
+            inputs.append(pattern)
+    return list(dict.fromkeys(inputs))
+
+
+def output_paths(inputs: List[str], out_dir: str) -> List[Path]:
+    """
+    Returns the output file of each input, named after the input, in out_dir.
+
+    Raises:
+    - ValueError: If several inputs have the same name.
+    """
+    outputs = [Path(out_dir) / f"{Path(input).stem}.adoc" for input in inputs]
+    duplicates = sorted(output.name for output, count in Counter(outputs).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Several specifications would be written to the same file: {', '.join(duplicates)}")
+    return outputs
+
+
+def convert_file(
+    input: str,
+    output: Path,
+    fast_load: bool = False,
+    resolve_refs: bool = False,
+    stream: bool = False,
+    use_mmap: bool = False,
+) -> str:
+    """
+    Convert one specification, with the same steps as a single specification is converted with.
+
+    Parameters:
+    - stream (bool): Write the result while it's rendered instead of rendering it in memory first.
+    - use_mmap (bool): Memory map the specification file instead of reading it into memory.
+
+    Returns:
+    - str: Why the specification couldn't be converted, None if it was converted.
+    """
+    try:
+        data = decoding.load(input, use_mmap=use_mmap)
+        schema: OpenApi = convert.prepare_schema(
+            data, partial(convert.load_schema, fast_load=fast_load), resolve_refs=resolve_refs
+        )
+
+        if stream:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, "w") as f:
+                schema.stream(f)
+        else:
+            result = schema.result
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, "w") as f:
+                f.write(result)
+    except Exception as error:
+        return f"{type(error).__name__}: {error}"
+
+    return None
+
+
+def _convert_file(arguments: tuple) -> str:
+    input, output, options = arguments
+    return convert_file(input, output, **options)
+
+
+def convert_files(inputs: List[str], out_dir: str, jobs: int, log: TextIO, **options) -> int:
+    """
+    Convert several specifications and report the result of each.
+
+    Parameters:
+    - inputs (list): The specification files.
+    - out_dir (str): Directory to write the results to, each named after its specification.
+    - jobs (int): Number of worker processes.
+    - log (TextIO): Where the result of each specification and a summary are reported.
+    - options: Passed on to convert_file().
+
+    Returns:
+    - int: The number of specifications that couldn't be converted.
+    """
+    tasks = [(input, output, options) for input, output in zip(inputs, output_paths(inputs, out_dir))]
+    if jobs > 1 and len(tasks) > 1:
+        with parallel.executor(min(jobs, len(tasks))) as pool:
+            errors = list(pool.map(_convert_file, tasks))
+    else:
+        errors = [_convert_file(task) for task in tasks]
+
+    for (input, output, _), error in zip(tasks, errors):
+        print(f"{input}: {'failed, ' + error if error else 'converted to ' + str(output)}", file=log)
+
+    failed = sum(error is not None for error in errors)
+    print(f"{len(tasks) - failed} converted, {failed} failed", file=log, flush=True)
+    return failed
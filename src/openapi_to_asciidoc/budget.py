@@ -0,0 +1,147 @@
+# Copyright © LFV
+"""Limits on how far schema_obj.j2 expands the schemas nested in a schema.
+
+schema_obj.j2 renders the schemas of items, not, allOf, anyOf, oneOf, properties and additionalProperties by
+ including itself, so a deeply nested or combinatorial schema takes long to render and makes the document large.
+ Each schema that isn't nested in another schema, e.g. one of the components or of a media type, starts an expansion
+ with a depth and node budget of its own. A nested schema that is deeper than max_depth, or that comes after
+ max_nodes schemas of the expansion were rendered, is rendered as a cross-reference to the schema it refers to if
+ it's a reference, otherwise as _Not expanded_. The rendered text only depends on the schema, not on where it is,
+ so it's the same whether the schema is rendered as a component, where it's referred to with --resolve-refs, from a
+ cache or in a worker process.
+
+Each schema whose expansion was cut off is reported with a warning when it's rendered. Component schemas are named by
+ their JSON pointer once the components are given with name_components(), before the document is rendered, other
+ schemas are described by their title or type. Schemas that are taken from the fragment cache or the disk cache
+ aren't rendered, so they aren't reported again.
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from openapi_to_asciidoc.objects import OpenApi  # objects imports this module through render
+
+# Template that expands schemas, limited by the budget.
+SCHEMA_TEMPLATE = "schema_obj.j2"
+
+_max_depth: int = None
+_max_nodes: int = None
+_state = threading.local()  # the service mode converts several documents at once, each in a thread of its own
+
+
+def configure(max_depth: int = None, max_nodes: int = None):
+    """
+    Configure the limits of schema expansion.
+
+    Parameters:
+    - max_depth (int): Levels of nested schemas that are expanded below a schema, None for no limit.
+    - max_nodes (int): Schemas that are expanded for a schema, itself included, None for no limit.
+    """
+    global _max_depth, _max_nodes
+
+    _max_depth = max_depth
+    _max_nodes = max_nodes
+
+
+def configuration() -> dict:
+    """Returns the arguments to configure() that schemas are expanded with, e.g. for worker processes."""
+    return {"max_depth": _max_depth, "max_nodes": _max_nodes}
+
+
+def limited() -> bool:
+    return _max_depth is not None or _max_nodes is not None
+
+
+def name_components(openapi: "OpenApi"):
+    """Give the document that is rendered next in this thread, to report its component schemas by their name."""
+    _state.schemas = openapi.components.schemas if openapi.components else None
+    _state.names = {}
+
+
+def component_name(object) -> str:
+    """Returns the name of the component schema that is the object, None if it isn't one."""
+    schemas = getattr(_state, "schemas", None)
+    if schemas is None:
+        return None
+    # the entries of lazily loaded components, and incrementally loaded ones that are alive, are in loaded
+    entries = getattr(schemas, "loaded", schemas)
+    name = _state.names.get(id(object))
+    if name is None or entries.get(name) is not object:
+        # only needed when an expansion is cut off, so the names are looked up again rather than kept up to date
+        _state.names = {id(entry): key for key, entry in entries.items()}
+        name = _state.names.get(id(object))
+    return name
+
+
+def pointer(name: str) -> str:
+    return "#/components/schemas/" + name.replace("~", "~0").replace("/", "~1")
+
+
+def describe(object) -> str:
+    title = getattr(object, "title", None)
+    if title:
+        return f"schema '{title}'"
+    return f"{getattr(object, 'type', None) or 'untyped'} schema"
+
+
+def expand(object, render_top: Callable, render_nested: Callable) -> str:
+    """
+    Render a schema within the budget of the expansion it's part of.
+
+    Parameters:
+    - object (SchemaObject): The schema.
+    - render_top (Callable): Renders the object if it isn't nested in another schema, it starts an expansion.
+    - render_nested (Callable): Renders the object if it's nested, which takes from the budget of the expansion.
+
+    Returns:
+    - str: The rendered schema, or a cross-reference if the budget is spent.
+    """
+    top = getattr(_state, "top", None)
+    if top is None:
+        return start(object, render_top)
+
+    if (_max_depth is not None and _state.depth >= _max_depth) or (
+        _max_nodes is not None and _state.nodes >= _max_nodes
+    ):
+        _state.cut += 1
+        return cut_off(object)
+
+    _state.nodes += 1
+    _state.depth += 1
+    try:
+        return render_nested(object)
+    finally:
+        _state.depth -= 1
+
+
+def start(object, render: Callable) -> str:
+    _state.top, _state.depth, _state.nodes, _state.cut = object, 0, 1, 0
+    try:
+        return render(object)
+    finally:
+        if _state.cut:
+            report(object, _state.cut)
+        _state.top = None
+
+
+def cut_off(object) -> str:
+    reference = getattr(object, "ref", None)
+    if reference:
+        # the same as format_ref in util.j2
+        return f"ref: <<{reference.replace('#', '').replace('/', '_')}, {reference}>>\n"
+    return "_Not expanded_\n"
+
+
+def report(object, cut: int):
+    limits = []
+    if _max_depth is not None:
+        limits.append(f"depth {_max_depth}")
+    if _max_nodes is not None:
+        limits.append(f"nodes {_max_nodes}")
+    name = component_name(object)
+    label = describe(object) if name is None else pointer(name)
+    logging.warning(
+        f"Schema {label} reached its expansion limit ({', '.join(limits)}), nested schemas not expanded: {cut}."
+    )
@@ -0,0 +1,264 @@
+# Copyright © LFV
+"""Incremental conversion, with the rendered path items, webhooks and components cached between conversions.
+
+Each entry is cached under a hash of its JSON, the template it's rendered with, the package version and the
+ checksums of all templates. An entry that is found in the cache is neither loaded, validated nor rendered again,
+ only the entries that changed since the cache was filled are. The cached and newly rendered entries are put back
+ in their original order, so the document is the same as when it's converted without the cache.
+
+Entries are cached on disk by DiskCache, or in memory by MemoryCache for a process that keeps converting, like
+ watch mode. On disk, entries are written to a temporary file that is then renamed, so that several processes can
+ share a cache directory without seeing partly written entries.
+"""
+
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Union
+
+from openapi_to_asciidoc import budget, examples, parallel, profiling, render
+from openapi_to_asciidoc.objects import OpenApi
+
+# Templates of the components that components_obj.j2 renders.
+COMPONENTS_TEMPLATES = {
+    "schemas": "schema_obj.j2",
+    "responses": "response_obj.j2",
+    "parameters": "parameter_obj.j2",
+    "examples": "example_obj.j2",
+    "headers": "header_obj.j2",
+    "links": "link_obj.j2",
+    "callbacks": "callback_obj.j2",
+}
+
+# Temporary files older than this are left behind by a process that didn't finish, and are removed by evict().
+TEMPORARY_FILE_MAX_AGE = 60 * 60
+
+
+class DiskCache:
+    """
+    Rendered fragments stored as files in a directory, with the time they were last used as modification time.
+
+    Parameters:
+    - directory (str): Where the fragments are stored, created if it doesn't exist.
+    - max_age (float): Seconds after their last use that fragments are removed by evict() (default: no limit).
+    - max_size (int): Bytes the fragments may use in total before evict() removes the least recently used ones
+     (default: no limit).
+    """
+
+    def __init__(self, directory: str, max_age: float = None, max_size: int = None):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.adoc"
+
+    def get(self, key: str) -> str:
+        """Returns the fragment stored under key, or None if there is none."""
+        path = self.path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # removed by another process since it was read
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        path = self.path(key)
+        os.makedirs(path.parent, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def evict(self):
+        """Remove fragments that are older than max_age, then the least recently used until max_size is met."""
+        now = time.time()
+        fragments = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            age = now - stat.st_mtime
+            if path.name.startswith("."):
+                if age > TEMPORARY_FILE_MAX_AGE:
+                    path.unlink(missing_ok=True)
+            elif self.max_age is not None and age > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                fragments.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_size is None:
+            return
+
+        size = sum(fragment_size for _, fragment_size, _ in fragments)
+        for _, fragment_size, path in sorted(fragments):
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= fragment_size
+
+
+class MemoryCache:
+    """
+    Rendered fragments kept in memory, with the same interface as DiskCache, for a process that converts repeatedly.
+
+    evict() drops the fragments that weren't used since the previous call, so that only the fragments of the latest
+     version of the document are kept.
+    """
+
+    def __init__(self):
+        self.fragments = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str:
+        text = self.fragments.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+
+        self.used.add(key)
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        self.fragments[key] = text
+        self.used.add(key)
+
+    def evict(self):
+        self.fragments = {key: text for key, text in self.fragments.items() if key in self.used}
+        self.used = set()
+
+
+def fingerprint() -> bytes:
+    """Returns a hash of everything besides an entry's JSON that its rendered text depends on, e.g. its limits."""
+    try:
+        package_version = version("openapi-to-asciidoc")
+    except PackageNotFoundError:
+        package_version = "local dev"
+
+    loader = render.get_source_loader()
+    environment = render.get_environment()
+    checksums = {name: render.checksum(loader.get_source(environment, name)[0]) for name in loader.list_templates()}
+    settings = [package_version, checksums, examples.configuration(), budget.configuration()]
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).digest()
+
+
+def entry_key(fingerprint: bytes, template_name: str, data) -> str:
+    entry = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(fingerprint + template_name.encode("utf-8") + b"\0" + entry.encode("utf-8")).hexdigest()
+
+
+def cached_maps(data: dict) -> list:
+    """Returns the location of each map in data whose entries are cached, with the template of the entries."""
+    maps = []
+    for name in ("paths", "webhooks"):
+        if isinstance(data.get(name), dict):
+            maps.append(((name,), "path_item_obj.j2"))
+
+    components = data.get("components")
+    if isinstance(components, dict):
+        for name, template_name in COMPONENTS_TEMPLATES.items():
+            if isinstance(components.get(name), dict):
+                maps.append((("components", name), template_name))
+
+    return maps
+
+
+def loaded_map(openapi: OpenApi, location: tuple) -> dict:
+    if location == ("paths",):
+        return openapi.paths.paths
+    if location == ("webhooks",):
+        return openapi.webhooks
+    return getattr(openapi.components, location[1])
+
+
+def replace_loaded_map(openapi: OpenApi, location: tuple, entries: dict):
+    if location == ("paths",):
+        openapi.paths.paths = entries
+    elif location == ("webhooks",):
+        openapi.webhooks = entries
+    else:
+        setattr(openapi.components, location[1], entries)
+
+
+def load_openapi(data: dict, disk_cache: Union[DiskCache, MemoryCache], load: Callable, jobs: int = 1) -> OpenApi:
+    """
+    Load a document with its path items, webhooks and components replaced by their rendered fragments.
+
+    The document is loaded in the "load" phase of the profiler and the entries that aren't cached are rendered in
+     its "render" phase.
+
+    Parameters:
+    - data (dict): The OpenAPI specification.
+    - disk_cache (DiskCache or MemoryCache): Where the fragments are looked up and newly rendered ones are stored.
+    - load (Callable): Loads the entries that are not cached, like OpenApiSchema().load().
+    - jobs (int): Number of processes to render the entries that are not cached with.
+
+    Raises:
+    - ValidationError: If an entry that isn't cached, or the rest of the document, is invalid.
+    """
+    key_prefix = fingerprint()
+    remaining = dict(data)
+    if isinstance(data.get("components"), dict):
+        remaining["components"] = dict(data["components"])
+
+    maps = cached_maps(data)
+    cached = {}
+    missing = []
+    for location, template_name in maps:
+        parent = remaining if len(location) == 1 else remaining["components"]
+        parent[location[-1]] = entries = dict(parent[location[-1]])
+        for name, entry in list(entries.items()):
+            if location == ("paths",) and not name.startswith("/"):
+                continue  # specification extension
+            key = entry_key(key_prefix, template_name, entry)
+            text = disk_cache.get(key)
+            if text is None:
+                missing.append((location, name, template_name, key))
+            else:
+                cached[location, name] = render.RenderedFragment(text)
+                del entries[name]
+
+    with profiling.phase("load"):
+        openapi: OpenApi = load(remaining)
+
+    for location, _ in maps:
+        loaded = loaded_map(openapi, location) or {}
+        source = data[location[0]] if len(location) == 1 else data["components"][location[1]]
+        entries = {name: cached.get((location, name)) or loaded.get(name) for name in source}
+        replace_loaded_map(openapi, location, {name: entry for name, entry in entries.items() if entry is not None})
+
+    if budget.limited():
+        budget.name_components(openapi)  # before the entries that aren't cached are rendered
+    objects = [(loaded_map(openapi, location)[name], template_name) for location, name, template_name, _ in missing]
+    with profiling.phase("render"):
+        texts = parallel.render_fragments(objects, jobs=jobs)
+    for (location, name, _, key), text in zip(missing, texts):
+        disk_cache.put(key, text)
+        loaded_map(openapi, location)[name] = render.RenderedFragment(text)
+
+    logging.info(f"Cached fragments: {disk_cache.hits} reused, {disk_cache.misses} rendered")
+    return openapi
@@ -4,17 +4,24 @@
 """
 
 import argparse
-import json
+from functools import partial
+import logging
 import os
 import sys
-from importlib.metadata import version
-from typing import TextIO, Union
+from typing import TYPE_CHECKING, Callable, TextIO, Union
 
 if __package__ is None or len(__package__) == 0:
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-    from openapi_to_asciidoc.objects import OpenApi, OpenApiSchema
-else:
-    from openapi_to_asciidoc.objects import OpenApi, OpenApiSchema
+
+# The other modules of the package are imported by the functions that use them, so that --help, --version and
+#  invalid arguments are answered without importing marshmallow, jinja2 and the rest of what a conversion needs.
+from openapi_to_asciidoc import decoding  # noqa: E402
+
+if TYPE_CHECKING:
+    from openapi_to_asciidoc.cache import DiskCache
+    from openapi_to_asciidoc.objects import OpenApi
+    from openapi_to_asciidoc.profiling import Profiler
+    from openapi_to_asciidoc.subset import Selection
 
 
 @staticmethod
@@ -42,18 +49,33 @@ def create_directory_and_open(file_path: Union[TextIO, str]) -> TextIO:
     return open(file_path, "w")
 
 
+class VersionAction(argparse.Action):
+    """Prints the version like argparse's version action, only looking it up when it's asked for."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):
+        help = help or "show program's version number and exit"
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        if __package__ is None or len(__package__) == 0:
+            ver = "local dev"
+        else:
+            from importlib.metadata import version
+
+            ver = version("openapi-to-asciidoc")
+        print(ver)
+        parser.exit()
+
+
 def get_arguments():
     parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter)
 
-    ver: str = "local dev" if __package__ is None else f"{version('openapi-to-asciidoc')}"
-
-    parser.add_argument("-V", "--version", action="version", version=ver)
+    parser.add_argument("-V", "--version", action=VersionAction)
 
     parser.add_argument(
         "-j",
         "--json",
-        help="OpenAPI JSON Specification File (default: openapi.json)",
-        type=argparse.FileType("r"),
+        help="OpenAPI JSON Specification File, - for stdin (default: openapi.json)",
         default="openapi.json",
     )
     parser.add_argument(
@@ -61,29 +83,505 @@ def get_arguments():
         "--output",
         nargs="?",
         help="Where to output result (default: stdout)",
-        type=lambda file: create_directory_and_open(file),
-        default=sys.stdout,
+        default=None,
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Convert several specification files, or glob patterns of them, to --out-dir instead of -j to -o",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="File listing specification files or glob patterns to convert to --out-dir, one per line",
+        default=None,
+    )
+    parser.add_argument(
+        "--out-dir",
+        help="Directory to write each of several converted specifications to, named after the specification",
+        default=None,
+    )
+    parser.add_argument(
+        "--split",
+        help="Write each path, or the paths of each tag, and each section to a file of its own next to the -o file, "
+        "which includes them",
+        choices=["path", "tag"],
+        default=None,
+    )
+    parser.add_argument(
+        "--include-tags",
+        help="Only convert the operations with one of these tags, and the components they use",
+        nargs="+",
+        metavar="TAG",
+        default=None,
+    )
+    parser.add_argument(
+        "--include-paths",
+        help="Only convert the operations of the paths and webhooks that match one of these glob patterns, e.g. "
+        "'/pets/*', and the components they use",
+        nargs="+",
+        metavar="PATTERN",
+        default=None,
+    )
+    parser.add_argument(
+        "--include-operations",
+        help="Only convert the operations with one of these operationIds, and the components they use",
+        nargs="+",
+        metavar="OPERATION_ID",
+        default=None,
+    )
+    parser.add_argument(
+        "--json-backend",
+        help="JSON library to decode the specification with, auto for the fastest that is installed (default: auto)",
+        choices=["auto", *decoding.BACKENDS],
+        default="auto",
+    )
+    parser.add_argument(
+        "--mmap",
+        help="Memory map the specification file instead of reading it into memory",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--template-cache-dir",
+        help="Directory where compiled templates are cached between runs (default: no cache)",
+        default=None,
+    )
+    parser.add_argument(
+        "--stream",
+        help="Write the result while it's rendered instead of rendering all of it in memory first",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--stream-input",
+        help="Load paths and components one entry at a time while rendering, for very large specifications "
+        "(implies --stream)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--jobs",
+        help="Number of processes to load components and render paths and webhooks with, or to convert several "
+        "specifications with (default: 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--fragment-cache-size",
+        help="Number of rendered fragments to reuse for identical operations, parameters, responses and schemas "
+        "(default: 0, no reuse)",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--fast-load",
+        help="Load the specification with generated deserializers instead of marshmallow's generic loading",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--validate-only",
+        help="Only validate the specifications and report all of their errors as JSON, to the output file or stdout",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--lazy",
+        help="Load path items, webhooks, components and operations when they are rendered instead of up front",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--strict",
+        help="With --lazy, still load and validate all of the specification before rendering it",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--resolve-refs",
+        help="Resolve the $ref values within the specification and render referenced schemas of request and "
+        "response content inline",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory where rendered path items, webhooks and components are cached, so that later runs only "
+        "load and render the ones that changed (default: no cache)",
+        default=None,
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        help="Days after their last use that cached entries are removed (default: no limit)",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        help="Megabytes the cached entries may use before the least recently used are removed (default: no limit)",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--max-example-bytes",
+        help="Example values whose JSON is larger than N bytes are summarized with the start of it, or written to "
+        "--example-dir (default: no limit)",
+        metavar="N",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--example-dir",
+        help="Directory, relative to the output file or --out-dir, where example values larger than "
+        "--max-example-bytes are written and included from (default: summarize them)",
+        default=None,
+    )
+    parser.add_argument(
+        "--max-schema-depth",
+        help="Levels of nested schemas that are expanded below a schema, deeper ones are rendered as a "
+        "cross-reference (default: no limit)",
+        metavar="N",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--max-schema-nodes",
+        help="Schemas that are expanded for a schema, itself included, the rest of them are rendered as a "
+        "cross-reference (default: no limit)",
+        metavar="N",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--profile",
+        help="Report wall time, CPU time and peak memory of each phase of the conversion as JSON, to the file or "
+        "to stderr if none is given",
+        nargs="?",
+        const="-",
+        default=None,
+    )
+    parser.add_argument(
+        "--profile-templates",
+        help="Report the N templates, and paths, webhooks and components, that took longest to render on stderr",
+        metavar="N",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--watch",
+        help="Keep running and convert the specification again every time it changes, only rendering what changed",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        help="Seconds between each check of the specification for changes in watch mode (default: 0.5)",
+        type=float,
+        default=0.5,
     )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    check_arguments(parser, args)
 
+    return args
 
-def main():
-    args = get_arguments()
 
-    js_input = args.json
-    output = args.output
+def check_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.json_backend != "auto" and args.json_backend not in decoding.available_backends():
+        parser.error(f"--json-backend {args.json_backend} isn't installed")
+    if args.fragment_cache_size < 0:
+        parser.error("--fragment-cache-size can't be negative")
+    if args.jobs > 1 and args.stream_input:
+        parser.error("--jobs can't be combined with --stream-input")
+    if args.resolve_refs and args.stream_input:
+        parser.error("--resolve-refs can't be combined with --stream-input")
+    if args.cache_dir and (args.stream_input or args.resolve_refs):
+        parser.error("--cache-dir can't be combined with --stream-input or --resolve-refs")
+    if args.lazy or args.strict:
+        check_lazy_arguments(parser, args)
+    if args.inputs or args.manifest:
+        check_batch_arguments(parser, args)
+    elif args.json != "-" and not os.path.isfile(args.json):
+        parser.error(f"argument -j/--json: can't open '{args.json}'")
+    check_output_arguments(parser, args)
+
+
+def check_output_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if args.watch and (args.output is None or args.json == "-"):
+        parser.error("--watch needs a specification file and an output file")
+    if args.watch and (args.stream_input or args.resolve_refs or args.profile or args.profile_templates):
+        parser.error("--watch can't be combined with --stream-input, --resolve-refs or profiling")
+    if args.profile_templates is not None and (args.profile_templates < 1 or args.jobs > 1 or args.stream_input):
+        parser.error("--profile-templates must be at least 1 and can't be combined with --jobs or --stream-input")
+    subset = args.include_tags or args.include_paths or args.include_operations
+    if subset and (args.stream_input or args.watch or args.inputs or args.manifest):
+        parser.error("the --include options can't be combined with --stream-input, --watch or several specifications")
+    if args.validate_only:
+        check_validate_arguments(parser, args)
+    if args.split and (args.output is None or args.stream or args.stream_input or args.watch):
+        parser.error("--split needs an output file and can't be combined with --stream, --stream-input or --watch")
+    if args.max_example_bytes is not None and args.max_example_bytes < 1:
+        parser.error("--max-example-bytes must be at least 1")
+    if args.example_dir and args.max_example_bytes is None:
+        parser.error("--example-dir is only used with --max-example-bytes")
+    if (args.max_schema_depth or 0) < 0 or (args.max_schema_nodes is not None and args.max_schema_nodes < 1):
+        parser.error("--max-schema-depth can't be negative and --max-schema-nodes must be at least 1")
+
+
+def check_validate_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if args.watch or args.stream or args.stream_input or args.split:
+        parser.error("--validate-only can't be combined with --watch, --stream, --stream-input or --split")
+    if args.cache_dir or args.lazy or args.profile or args.profile_templates:
+        parser.error("--validate-only can't be combined with --cache-dir, --lazy or profiling")
+    if args.include_tags or args.include_paths or args.include_operations:
+        parser.error("--validate-only can't be combined with the --include options")
+
+
+def check_lazy_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if args.strict and not args.lazy:
+        parser.error("--strict is only used with --lazy, the specification is validated up front without it")
+    if args.jobs > 1 or args.fast_load or args.stream_input or args.resolve_refs or args.cache_dir:
+        parser.error("--lazy can't be combined with --jobs, --fast-load, --stream-input, --resolve-refs or --cache-dir")
+    if args.watch or args.inputs or args.manifest:
+        parser.error("--lazy can't be combined with --watch or several specifications")
+
+
+def check_batch_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    if not args.out_dir and not args.validate_only:
+        parser.error("several specifications are converted to --out-dir, which is missing")
+    if args.output is not None and not args.validate_only:
+        parser.error("several specifications are converted to --out-dir, not to -o/--output")
+    if args.watch or args.stream_input or args.cache_dir or args.split or args.profile or args.profile_templates:
+        parser.error(
+            "several specifications can't be converted with --watch, --stream-input, --cache-dir, --split or profiling"
+        )
+
+
+def configure_examples(args: argparse.Namespace):
+    """Configure the size cap of examples, the example directory is relative to where the documents are written."""
+    from openapi_to_asciidoc import examples
+
+    directory = None
+    if args.example_dir:
+        base = args.out_dir if args.inputs or args.manifest else os.path.dirname(args.output or "")
+        directory = os.path.join(base or ".", args.example_dir)
+    examples.configure(args.max_example_bytes, directory=directory, include_directory=args.example_dir)
+
+
+def load_schema(
+    openapi: dict, jobs: int = 1, fast_load: bool = False, lazy: bool = False, strict: bool = False
+) -> "OpenApi":
+    """Load a decoded specification with a new schema, the way the options of a conversion ask for."""
+    from openapi_to_asciidoc.objects import OpenApiSchema
+
+    if jobs > 1:
+        from openapi_to_asciidoc import parallel
+
+        return parallel.load_openapi(openapi, jobs=jobs)
+    if fast_load:
+        from openapi_to_asciidoc import fastload
+
+        return fastload.load(OpenApiSchema, openapi)
+    if lazy:
+        from openapi_to_asciidoc import lazy
+
+        return lazy.load(openapi, strict=strict)
+
+    openapi_schema = OpenApiSchema()
+    return openapi_schema.load(openapi)
+
+
+def get_disk_cache(args: argparse.Namespace) -> "DiskCache":
+    if not args.cache_dir:
+        return None
+
+    from openapi_to_asciidoc import cache
+
+    max_age = args.cache_max_age * 24 * 60 * 60 if args.cache_max_age is not None else None
+    max_size = int(args.cache_max_size * 1024 * 1024) if args.cache_max_size is not None else None
+    return cache.DiskCache(args.cache_dir, max_age=max_age, max_size=max_size)
+
+
+def convert_batch(args: argparse.Namespace) -> int:
+    from openapi_to_asciidoc import batch
+
+    patterns = list(args.inputs)
+    if args.manifest:
+        patterns += batch.read_manifest(args.manifest)
+
+    inputs = batch.expand_inputs(patterns)
+    try:
+        options = {
+            "fast_load": args.fast_load,
+            "resolve_refs": args.resolve_refs,
+            "stream": args.stream,
+            "use_mmap": args.mmap,
+        }
+        failed = batch.convert_files(inputs, args.out_dir, jobs=args.jobs, log=sys.stderr, **options)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    return 1 if failed else 0
+
+
+def validate_specifications(args: argparse.Namespace) -> int:
+    """Validate the specifications and write the report, returns 1 if any of them is invalid."""
+    import json
+
+    from openapi_to_asciidoc import batch, validate
+
+    inputs = [args.json]
+    if args.inputs or args.manifest:
+        patterns = list(args.inputs) + (batch.read_manifest(args.manifest) if args.manifest else [])
+        inputs = batch.expand_inputs(patterns)
+
+    report = validate.validate_files(inputs, jobs=args.jobs)
+    output = open_output(args.output)
+    json.dump(report, output, indent=2)
+    output.write("\n")
+    return 0 if report["valid"] else 1
+
+
+def open_input(path: str):
+    return sys.stdin.buffer if path == "-" else open(path, "rb")
+
+
+def open_output(path: str) -> TextIO:
+    return create_directory_and_open(path) if path is not None else sys.stdout
+
+
+def write_result(schema: "OpenApi", openapi: dict, args: argparse.Namespace):
+    from openapi_to_asciidoc import profiling, split
+
+    if args.split:
+        with profiling.phase("render"):
+            written, unchanged = split.write_split(schema, openapi, args.output, by=args.split)
+        logging.info(f"Split output: {written} files written, {unchanged} unchanged")
+    elif args.stream:
+        schema.stream(open_output(args.output))
+    else:
+        result = schema.result
+        with profiling.phase("write"):
+            open_output(args.output).write(result)
+
+
+def select_operations(openapi, selection: "Selection"):
+    """Returns the decoded specification pruned to the selected operations, as it is if all of them are selected."""
+    from openapi_to_asciidoc import profiling, subset
+
+    if not selection:
+        return openapi
+    with profiling.phase("subset"):
+        return subset.subset(openapi, selection)
+
+
+def prepare_schema(
+    openapi: dict, load: Callable, disk_cache: "DiskCache" = None, resolve_refs: bool = False, jobs: int = 1
+) -> "OpenApi":
+    """
+    Load a decoded specification and make it ready to render, the steps that the service and batch modes share.
+
+    Parameters:
+    - openapi (dict): The decoded specification, with the selected operations.
+    - load (Callable): Loads the decoded specification, e.g. load_schema().
+    - disk_cache (DiskCache): Cache of rendered entries to reuse, None for no cache.
+    - resolve_refs (bool): Resolve the references of the loaded specification.
+    - jobs (int): Number of worker processes that render the entries that aren't in the disk cache.
+
+    Returns:
+    - OpenApi: The loaded specification.
+    """
+    from openapi_to_asciidoc import budget, cache, profiling, resolve
+
+    if disk_cache is not None:
+        # the entries that aren't cached are rendered while loading, measured as rendering
+        schema: OpenApi = cache.load_openapi(openapi, disk_cache, load=load, jobs=jobs)
+    else:
+        with profiling.phase("load"):
+            schema: OpenApi = load(openapi)
+
+    if resolve_refs:
+        with profiling.phase("resolve"):
+            resolve.resolve_references(schema)
+    if profiling.template_profiler() is not None:
+        profiling.template_profiler().label_objects(schema)
+    if budget.limited():
+        budget.name_components(schema)
+    return schema
+
+
+def convert(args: argparse.Namespace, disk_cache: "DiskCache", load: Callable):
+    from openapi_to_asciidoc import parallel, profiling, render, subset
 
     # read openapi json input
-    openapi = json.load(js_input)
+    with profiling.phase("parse"):
+        openapi = decoding.load(args.json, use_mmap=args.mmap)
+    selection = subset.Selection(tags=args.include_tags, paths=args.include_paths, operations=args.include_operations)
+    openapi = select_operations(openapi, selection)
 
     # render template from schema
-    openapi_schema = OpenApiSchema()
-    schema: OpenApi = openapi_schema.load(openapi)
+    schema = prepare_schema(openapi, load, disk_cache=disk_cache, resolve_refs=args.resolve_refs, jobs=args.jobs)
+    if args.jobs > 1:
+        with profiling.phase("render"):
+            parallel.render_path_items(schema, jobs=args.jobs)
 
     # output rendered result
-    output.write(schema.result)
+    write_result(schema, openapi, args)
+
+    if disk_cache is not None:
+        disk_cache.evict()
+    fragment_cache = render.fragment_cache()
+    if fragment_cache is not None:
+        logging.info(f"Fragment cache: {fragment_cache.hits} hits, {fragment_cache.misses} misses")
+
+
+def write_profile(profiler: "Profiler", path: str):
+    if path == "-":
+        profiler.write_report(sys.stderr)
+    else:
+        with create_directory_and_open(path) as f:
+            profiler.write_report(f)
+
+
+def main():
+    if sys.argv[1:2] == ["serve"]:
+        from openapi_to_asciidoc import serve
+
+        return serve.main(sys.argv[2:])
+
+    args = get_arguments()
+
+    from openapi_to_asciidoc import budget, cache, ingest, profiling, render, watch
+
+    decoding.configure(args.json_backend)
+    render.configure(template_cache_dir=args.template_cache_dir, fragment_cache_size=args.fragment_cache_size)
+    configure_examples(args)
+    budget.configure(max_depth=args.max_schema_depth, max_nodes=args.max_schema_nodes)
+    disk_cache = get_disk_cache(args)
+    load = partial(load_schema, jobs=args.jobs, fast_load=args.fast_load, lazy=args.lazy, strict=args.strict)
+
+    if args.validate_only:
+        return validate_specifications(args)
+    if args.inputs or args.manifest:
+        return convert_batch(args)
+
+    if args.watch:
+        fragments = disk_cache if disk_cache is not None else cache.MemoryCache()
+        watch.watch(args.json, args.output, fragments, load=load, interval=args.watch_interval, jobs=args.jobs)
+        return 0
+
+    profiler = profiling.enable() if args.profile else None
+    template_profiler = profiling.enable_templates() if args.profile_templates else None
+
+    if args.stream_input:
+        with open_input(args.json) as js_input, ingest.load(js_input) as schema:
+            if budget.limited():
+                budget.name_components(schema)
+            schema.stream(open_output(args.output))
+    else:
+        convert(args, disk_cache, load)
+
+    if profiler is not None:
+        write_profile(profiler, args.profile)
+    if template_profiler is not None:
+        sys.stderr.write(template_profiler.report(top=args.profile_templates))
+
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
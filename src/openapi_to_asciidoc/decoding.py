@@ -0,0 +1,117 @@
+# Copyright © LFV
+"""Decoding of the JSON specification with the fastest JSON library that is installed.
+
+The specification is read as bytes, or memory mapped, and given to the decoder as it is, without decoding it to a
+ str first. orjson and ujson are used when they are installed, with the json module of the standard library as
+ the fallback that is always available. Input that a faster library rejects, e.g. NaN or integers too large for
+ 64 bits, is decoded by the json module instead, so the result and any errors are always the same as json.loads().
+"""
+
+import importlib
+import json
+import mmap
+import sys
+from typing import List
+
+# Supported backends, fastest first.
+BACKENDS = ("orjson", "ujson", "json")
+
+# Backends that decode a memoryview of a memory mapped file without copying it to bytes first.
+BUFFER_BACKENDS = {"orjson"}
+
+_backend: str = None
+_module = None
+
+
+def import_backend(name: str):
+    """Returns the module of the backend, None if it isn't installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def available_backends() -> List[str]:
+    """Returns the backends that are installed, fastest first."""
+    return [name for name in BACKENDS if import_backend(name) is not None]
+
+
+def configure(backend: str = "auto"):
+    """
+    Choose the backend that loads() and load() decode with.
+
+    Parameters:
+    - backend (str): One of BACKENDS, or auto for the fastest that is installed.
+
+    Raises:
+    - ValueError: If the backend is unknown or not installed.
+    """
+    global _backend, _module
+
+    if backend == "auto":
+        backend = available_backends()[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend {backend}, use one of {', '.join(BACKENDS)}")
+
+    module = import_backend(backend)
+    if module is None:
+        raise ValueError(f"JSON backend {backend} isn't installed")
+
+    _backend = backend
+    _module = module
+
+
+def configuration() -> dict:
+    """Returns the arguments to configure() for the backend in use, e.g. for worker processes."""
+    return {"backend": backend()}
+
+
+def backend() -> str:
+    """Returns the name of the backend in use."""
+    if _backend is None:
+        configure()
+    return _backend
+
+
+def loads(data):
+    """
+    Decode a JSON document like json.loads(), with the configured backend.
+
+    Parameters:
+    - data: The document as str, bytes or a buffer like a memoryview of a memory mapped file.
+
+    Raises:
+    - JSONDecodeError: The same error as json.loads() raises.
+    """
+    name = backend()
+    if name != "json":
+        try:
+            return _module.loads(data if name in BUFFER_BACKENDS or isinstance(data, (str, bytes)) else bytes(data))
+        except (ValueError, OverflowError, TypeError):
+            pass  # decoded by json below, for the same result or error as json.loads()
+
+    return json.loads(data if isinstance(data, (str, bytes, bytearray)) else bytes(data))
+
+
+def load(path: str, use_mmap: bool = False):
+    """
+    Read and decode a JSON file with the configured backend.
+
+    Parameters:
+    - path (str): The file, - for stdin.
+    - use_mmap (bool): Memory map the file instead of reading it into memory, for very large files.
+    """
+    if path == "-":
+        return loads(sys.stdin.buffer.read())
+
+    with open(path, "rb") as f:
+        if use_mmap:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass  # e.g. an empty file or a pipe, read below
+            else:
+                with buffer, memoryview(buffer) as view:
+                    return loads(view)
+
+        return loads(f.read())
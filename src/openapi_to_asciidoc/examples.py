@@ -0,0 +1,127 @@
+# Copyright © LFV
+"""Size cap for the example values of a specification.
+
+An example value whose JSON is larger than the cap isn't rendered as a table or a dump of its value. It's
+ summarized with the start of its JSON instead, or, if a directory for examples is configured, written to a file
+ of its own there that the document includes. The JSON of an example is encoded piece by piece: a value is only
+ encoded up to the cap to find out that it's too large, and a file is written while the value is encoded.
+
+Files are named after a hash of their content, so an example that appears several times is only written once,
+ and a file that is already there isn't written again.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Iterator
+
+# Characters of a value's JSON shown when it's summarized, at most max_bytes of them.
+PREVIEW_SIZE = 500
+
+_max_bytes: int = None
+_directory: str = None
+_include_directory: str = None
+
+
+def configure(max_bytes: int = None, directory: str = None, include_directory: str = None):
+    """
+    Configure the size cap of examples.
+
+    Parameters:
+    - max_bytes (int): Size of the JSON of the largest example value that is rendered as it is, None for no cap.
+    - directory (str): Where larger example values are written, None to summarize them instead.
+    - include_directory (str): The directory as the include directives refer to it, relative to the directory of the
+     document or absolute (default: directory).
+    """
+    global _max_bytes, _directory, _include_directory
+
+    _max_bytes = max_bytes
+    _directory = directory
+    _include_directory = include_directory if include_directory is not None else directory
+
+
+def configuration() -> dict:
+    """Returns the arguments to configure() that examples are capped with, e.g. for worker processes."""
+    return {"max_bytes": _max_bytes, "directory": _directory, "include_directory": _include_directory}
+
+
+def encode(value) -> Iterator[str]:
+    """Returns the JSON of the value in pieces. Non-ASCII characters are escaped, so each character is one byte."""
+    if isinstance(value, str):
+        return iter([json.dumps(value)])
+    return json.JSONEncoder(indent=2).iterencode(value)
+
+
+def exceeds(value, max_bytes: int) -> bool:
+    """Returns True if the JSON of the value is larger than max_bytes, without encoding more of it than that."""
+    size = 0
+    for chunk in encode(value):
+        size += len(chunk)
+        if size > max_bytes:
+            return True
+    return False
+
+
+def describe(value) -> str:
+    if isinstance(value, dict):
+        return f"an object with {len(value)} keys"
+    if isinstance(value, list):
+        return f"an array of {len(value)} items"
+    return f"a {type(value).__name__}"
+
+
+def preview(value, size: int) -> str:
+    chunks = []
+    length = 0
+    for chunk in encode(value):
+        chunks.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            break
+    return "".join(chunks)[:size]
+
+
+def write_file(value, directory: str) -> tuple:
+    """Write the JSON of the value to a file in directory, returns the name of the file and its size."""
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            for chunk in encode(value):
+                f.write(chunk)
+                digest.update(chunk.encode("utf-8"))
+                size += len(chunk)
+            f.write("\n")
+        name = f"{digest.hexdigest()[:16]}.json"
+        if os.path.exists(os.path.join(directory, name)):
+            os.unlink(temporary)  # left as it is, for tools that go by modification times
+        else:
+            os.replace(temporary, os.path.join(directory, name))
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return name, size
+
+
+def render_large(value) -> str:
+    """
+    Render an example value that is larger than the cap, available as large_example() in the templates.
+
+    Returns:
+    - str: The summary of the value, or the include directive of its file, "" if the value is rendered as it is.
+    """
+    if _max_bytes is None or not exceeds(value, _max_bytes):
+        return ""
+
+    if _directory is None:
+        text = preview(value, min(PREVIEW_SIZE, _max_bytes))
+        return f"_Larger than {_max_bytes} bytes, {describe(value)}, starting with:_\n\n----\n{text} ...\n----\n"
+
+    name, size = write_file(value, _directory)
+    # {docdir} is the directory of the master document, also when the directive is in a part of a split document
+    directory = _include_directory if os.path.isabs(_include_directory) else f"{{docdir}}/{_include_directory}"
+    target = f"{directory}/{name}"
+    return f"_{size} bytes, {describe(value)}:_\n\n[source,json]\n----\ninclude::{target}[]\n----\n"
@@ -0,0 +1,174 @@
+# Copyright © LFV
+"""Fast loading of the object model with deserializers generated from the marshmallow schemas.
+
+For each schema in objects.py a plain python function is generated once, that runs the same pre_load hooks,
+ field conversions, field validators and post_load hooks as marshmallow does, without marshmallow's generic
+ machinery and without creating new schema instances for every nested object.
+
+The generated functions only handle input they are certain to load exactly like marshmallow does. For anything
+ else, such as invalid values or unknown fields, the whole document is loaded by marshmallow instead, so the
+ result and any validation errors are always the same as with Schema.load().
+"""
+
+from typing import Callable
+
+from marshmallow import Schema, ValidationError, fields, missing
+
+SUPPORTED_HOOKS = {"pre_load", "post_load", "validates"}
+
+
+class Fallback(Exception):
+    """Raised by the generated functions for input that has to be loaded by marshmallow."""
+
+
+class LoaderGenerator:
+    """Generates the source of the loading functions of a schema and all schemas nested in it."""
+
+    def __init__(self):
+        self.namespace = {"MISSING": missing, "Fallback": Fallback}
+        self.functions = {}
+        self.sources = []
+        self.count = 0
+
+    def unique_name(self, prefix: str) -> str:
+        self.count += 1
+        return f"{prefix}_{self.count}"
+
+    def reference(self, value) -> str:
+        name = f"_ref{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def function(self, schema_class: type) -> str:
+        """Returns the name of the function that loads schema_class, generating it the first time."""
+        if schema_class not in self.functions:
+            self.functions[schema_class] = self.unique_name(f"load_{schema_class.__name__}")
+            self.sources.append(self.schema_source(schema_class, self.functions[schema_class]))
+        return self.functions[schema_class]
+
+    def compile(self, schema_class: type) -> Callable:
+        name = self.function(schema_class)
+        exec("\n\n".join(self.sources), self.namespace)
+        return self.namespace[name]
+
+    def schema_source(self, schema_class: type, name: str) -> str:
+        schema: Schema = schema_class()
+        hooks = {tag: hooks for tag, hooks in schema._hooks.items() if hooks}
+        unsupported = any(many or options.get("pass_original") for hook in hooks.values() for _, many, options in hook)
+        if unsupported or not set(hooks) <= SUPPORTED_HOOKS:
+            return f"def {name}(data):\n    raise Fallback"
+
+        lines = [f"def {name}(data):", "    if type(data) is not dict:", "        raise Fallback"]
+        # pre_load hooks change the data they are given, work on a copy to keep the input intact for a fallback
+        lines.append("    data = dict(data)")
+        for attr_name, _, _ in hooks.get("pre_load", []):
+            lines.append(f"    data = {self.reference(getattr(schema, attr_name))}(data, many=False, partial=None)")
+
+        data_keys = {field.data_key or field_name for field_name, field in schema.load_fields.items()}
+        lines += ["    if type(data) is not dict or not {}.issuperset(data):".format(self.reference(data_keys))]
+        lines += ["        raise Fallback", "    result = {}"]
+
+        for field_name, field in schema.load_fields.items():
+            lines += self.field_source(field, field.data_key or field_name, field.attribute or field_name)
+
+        for attr_name, _, options in hooks.get("validates", []):
+            attribute = schema.fields[options["field_name"]].attribute or options["field_name"]
+            validator = self.reference(getattr(schema, attr_name))
+            lines.append(f"    if {attribute!r} in result:")
+            lines.append(f"        {validator}(result[{attribute!r}])")
+
+        for attr_name, _, _ in hooks.get("post_load", []):
+            lines.append(f"    result = {self.reference(getattr(schema, attr_name))}(result, many=False, partial=None)")
+
+        lines.append("    return result")
+        return "\n".join(lines)
+
+    def field_source(self, field: fields.Field, data_key: str, attribute: str) -> list:
+        lines = [f"    value = data.get({data_key!r}, MISSING)", "    if value is not MISSING:"]
+        lines.append(f"        result[{attribute!r}] = {self.expression(field, 'value')}")
+        if field.required:
+            lines += ["    else:", "        raise Fallback"]
+        elif field.load_default is not missing:
+            lines += ["    else:", f"        result[{attribute!r}] = {self.reference(field)}.deserialize(MISSING)"]
+        return lines
+
+    def expression(self, field: fields.Field, value: str) -> str:
+        """Returns a python expression that deserializes the variable named value like field.deserialize()."""
+        field_ref = self.reference(field)
+        generic = f"{field_ref}.deserialize({value})"
+        if field.validators or field.allow_none:
+            return generic
+
+        field_type = type(field)
+        if field_type is fields.String:
+            return f"{value} if type({value}) is str else {generic}"
+        if field_type is fields.Boolean:
+            return f"{value} if {value} is True or {value} is False else {generic}"
+        if field_type is fields.Integer:
+            return f"{value} if type({value}) is int else {generic}"
+        if field_type is fields.Float:
+            return f"{value} if type({value}) is float and {value} - {value} == 0 else {generic}"
+        if field_type in (fields.Raw, fields.Field):
+            return f"{value} if {value} is not None else {generic}"
+        if field_type is fields.Nested:
+            return f"{self.nested_function(field)}({value})"
+        if field_type is fields.List:
+            return f"{self.list_function(field)}({value})"
+        if field_type is fields.Dict:
+            return f"{self.dict_function(field)}({value})"
+        return generic
+
+    def nested_function(self, field: fields.Nested) -> str:
+        if field.many or field.only or field.exclude or field.unknown is not None:
+            return self.fallback_function()
+        return self.function(type(field.schema))
+
+    def list_function(self, field: fields.List) -> str:
+        name = self.unique_name("convert_list")
+        self.sources.append(
+            f"def {name}(value):\n"
+            "    if type(value) is not list:\n"
+            "        raise Fallback\n"
+            f"    return [{self.expression(field.inner, 'item')} for item in value]"
+        )
+        return name
+
+    def dict_function(self, field: fields.Dict) -> str:
+        name = self.unique_name("convert_dict")
+        key = "key" if field.key_field is None else self.expression(field.key_field, "key")
+        item = "item" if field.value_field is None else self.expression(field.value_field, "item")
+        self.sources.append(
+            f"def {name}(value):\n"
+            "    if type(value) is not dict:\n"
+            "        raise Fallback\n"
+            f"    return {{{key}: {item} for key, item in value.items()}}"
+        )
+        return name
+
+    def fallback_function(self) -> str:
+        name = self.unique_name("fallback")
+        self.sources.append(f"def {name}(value):\n    raise Fallback")
+        return name
+
+
+_loaders = {}
+
+
+def loader(schema_class: type) -> Callable:
+    """Returns the generated loading function of schema_class, raising Fallback for input it can't load."""
+    if schema_class not in _loaders:
+        _loaders[schema_class] = LoaderGenerator().compile(schema_class)
+    return _loaders[schema_class]
+
+
+def load(schema_class: type, data):
+    """
+    Load data like schema_class().load(data), but faster.
+
+    Raises:
+    - ValidationError: The same error as schema_class().load(data) raises.
+    """
+    try:
+        return loader(schema_class)(data)
+    except (Fallback, ValidationError):
+        return schema_class().load(data)
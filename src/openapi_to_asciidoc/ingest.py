@@ -0,0 +1,248 @@
+# Copyright © LFV
+"""Incremental loading of large OpenAPI specifications.
+
+The specification file is memory mapped and scanned once to find where each entry of paths, webhooks and
+ the components maps starts and ends. Only the rest of the document is parsed up front. An entry is parsed,
+ validated and turned into its object the moment a template renders it, and is dropped again afterwards.
+ Together with streaming output this keeps memory use bounded by the largest entry instead of the whole file.
+"""
+
+from collections.abc import Mapping
+from contextlib import contextmanager
+import io
+import mmap
+import re
+from typing import BinaryIO, Iterator, Union
+import weakref
+
+from marshmallow import Schema, ValidationError
+
+from openapi_to_asciidoc import decoding
+from openapi_to_asciidoc.objects import (
+    CallbackObjectSchema,
+    ComponentsObject,
+    ComponentsObjectSchema,
+    ExampleObjectSchema,
+    HeaderObjectSchema,
+    LinkObjectSchema,
+    OpenApi,
+    OpenApiSchema,
+    ParameterObjectSchema,
+    PathItemObjectSchema,
+    PathsItem,
+    PathsItemObjectSchema,
+    RequestBodySchema,
+    ResponseObjectSchema,
+    SchemaObjectSchema,
+    SecuritySchemeObjectSchema,
+)
+
+Buffer = Union[bytes, mmap.mmap]
+
+# Schemas of the entries in each map of the components object.
+COMPONENTS_SCHEMAS = {
+    "schemas": SchemaObjectSchema,
+    "responses": ResponseObjectSchema,
+    "parameters": ParameterObjectSchema,
+    "examples": ExampleObjectSchema,
+    "requestBodies": RequestBodySchema,
+    "headers": HeaderObjectSchema,
+    "securitySchemes": SecuritySchemeObjectSchema,
+    "links": LinkObjectSchema,
+    "callbacks": CallbackObjectSchema,
+    "pathItems": PathItemObjectSchema,
+}
+
+WHITESPACE = re.compile(rb"[ \t\n\r]*")
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+SCALAR = re.compile(rb"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null")
+STRUCTURE = re.compile(rb'["{}\[\]]')
+
+
+def skip_whitespace(buffer: Buffer, pos: int) -> int:
+    return WHITESPACE.match(buffer, pos).end()
+
+
+def char_at(buffer: Buffer, pos: int) -> bytes:
+    end = pos + 1
+    return buffer[pos:end]
+
+
+def skip_value(buffer: Buffer, pos: int) -> int:
+    """Returns the position right after the JSON value starting at pos, without decoding it."""
+    first = char_at(buffer, pos)
+    if first == b'"':
+        return match(STRING, buffer, pos).end()
+    if first not in (b"{", b"["):
+        return match(SCALAR, buffer, pos).end()
+
+    depth = 0
+    while True:
+        token = STRUCTURE.search(buffer, pos)
+        if token is None:
+            raise ValueError(f"Invalid JSON: unterminated value starting at byte {pos}")
+
+        char = token.group()
+        if char == b'"':
+            pos = match(STRING, buffer, token.start()).end()
+            continue
+
+        depth += 1 if char in (b"{", b"[") else -1
+        pos = token.end()
+        if depth == 0:
+            return pos
+
+
+def match(pattern: re.Pattern, buffer: Buffer, pos: int) -> re.Match:
+    found = pattern.match(buffer, pos)
+    if found is None:
+        raise ValueError(f"Invalid JSON at byte {pos}")
+    return found
+
+
+def expect(buffer: Buffer, pos: int, char: bytes) -> int:
+    if char_at(buffer, pos) != char:
+        raise ValueError(f"Invalid JSON at byte {pos}: expected {char.decode()}")
+    return skip_whitespace(buffer, pos + 1)
+
+
+def scan_object(buffer: Buffer, pos: int) -> dict:
+    """
+    Find the members of the JSON object starting at pos.
+
+    Returns:
+    - dict: The decoded key of each member, mapped to the start and end position of its value.
+    """
+    members = {}
+    pos = expect(buffer, skip_whitespace(buffer, pos), b"{")
+    if char_at(buffer, pos) == b"}":
+        return members
+
+    while True:
+        key = match(STRING, buffer, pos)
+        pos = expect(buffer, skip_whitespace(buffer, key.end()), b":")
+        end = skip_value(buffer, pos)
+        members[decoding.loads(key.group())] = (pos, end)
+
+        pos = skip_whitespace(buffer, end)
+        if char_at(buffer, pos) == b"}":
+            return members
+        pos = expect(buffer, pos, b",")
+
+
+class LazyEntries(Mapping):
+    """
+    Read-only mapping of the entries of a JSON object that are loaded with a schema each time they are accessed.
+
+    The validation errors of an entry are raised with the same messages as when the whole document is loaded, the
+     location is where the map is in the messages, e.g. ("paths", "paths") for the path items.
+
+    Entries are not kept after they are returned, so iterating over items() only holds one entry at a time. The
+     entries that are still in use are in loaded, by key, e.g. to find the name of a component that is rendered.
+    """
+
+    def __init__(self, buffer: Buffer, members: dict, schema: Schema, location: tuple):
+        self.buffer = buffer
+        self.members = members
+        self.schema = schema
+        self.location = location
+        self.loaded = weakref.WeakValueDictionary()
+
+    def __getitem__(self, key):
+        start, end = self.members[key]
+        data = decoding.loads(self.buffer[start:end])
+        try:
+            entry = self.schema.load(data)
+        except ValidationError as error:
+            messages = {key: {"value": error.messages}}  # the messages of a value of a Dict field
+            for name in reversed(self.location):
+                messages = {name: messages}
+            raise ValidationError(messages) from error
+        self.loaded[key] = entry
+        return entry
+
+    def __iter__(self) -> Iterator:
+        return iter(self.members)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+
+def decode_members(buffer: Buffer, members: dict) -> dict:
+    return {key: decoding.loads(buffer[start:end]) for key, (start, end) in members.items()}
+
+
+def take_objects(buffer: Buffer, members: dict, keys) -> dict:
+    """Removes the members that are JSON objects with one of the keys from members and returns them."""
+    return {key: members.pop(key) for key in keys if key in members and char_at(buffer, members[key][0]) == b"{"}
+
+
+def load_paths(buffer: Buffer, start: int) -> PathsItem:
+    members = scan_object(buffer, start)
+    # the specification extensions and invalid paths are loaded up front, to raise the same errors as the schema
+    rest = {key: members.pop(key) for key in [key for key in members if not key.startswith("/")]}
+    try:
+        paths_item: PathsItem = PathsItemObjectSchema().load(decode_members(buffer, rest))
+    except ValidationError as error:
+        raise ValidationError({"paths": error.messages}) from error
+
+    paths = LazyEntries(buffer, members, PathItemObjectSchema(), ("paths", "paths"))
+    return PathsItem(paths=paths, x_variables=paths_item.x_variables)
+
+
+def load_components(buffer: Buffer, start: int) -> ComponentsObject:
+    members = scan_object(buffer, start)
+    maps = take_objects(buffer, members, COMPONENTS_SCHEMAS)
+    try:
+        # validates what isn't loaded incrementally, e.g. rejects unknown fields
+        rest: ComponentsObject = ComponentsObjectSchema().load(decode_members(buffer, members))
+    except ValidationError as error:
+        raise ValidationError({"components": error.messages}) from error
+
+    components = {}
+    for name, (map_start, _) in maps.items():
+        entries = scan_object(buffer, map_start)
+        components[name] = LazyEntries(buffer, entries, COMPONENTS_SCHEMAS[name](), ("components", name))
+
+    return ComponentsObject(**components, x_variables=rest.x_variables)
+
+
+def load_document(buffer: Buffer) -> OpenApi:
+    members = scan_object(buffer, 0)
+    # fields that aren't objects are left for the schema to reject
+    large = take_objects(buffer, members, ("paths", "webhooks", "components"))
+
+    openapi: OpenApi = OpenApiSchema().load(decode_members(buffer, members))
+
+    if "paths" in large:
+        openapi.paths = load_paths(buffer, large["paths"][0])
+    if "webhooks" in large:
+        webhooks = scan_object(buffer, large["webhooks"][0])
+        openapi.webhooks = LazyEntries(buffer, webhooks, PathItemObjectSchema(), ("webhooks",))
+    if "components" in large:
+        openapi.components = load_components(buffer, large["components"][0])
+
+    return openapi
+
+
+@contextmanager
+def load(file: BinaryIO) -> Iterator[OpenApi]:
+    """
+    Load an OpenAPI specification incrementally.
+
+    Parameters:
+    - file (BinaryIO): The specification, opened in binary mode. Files that can't be memory mapped are read to memory.
+
+    Returns:
+    - OpenApi: The document, usable until the context is left. Paths, webhooks and components are loaded when used.
+    """
+    try:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        buffer = file.read()
+
+    try:
+        yield load_document(buffer)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
@@ -0,0 +1,219 @@
+# Copyright © LFV
+"""Lazy loading of OpenAPI specifications.
+
+Only the small top level fields of the document are loaded up front. The path items, webhooks and entries of the
+ components maps keep their decoded JSON until a template uses them, and the operations of a path item are kept the
+ same way until they are used. Each is then validated and turned into its object with its schema once, and the object
+ is kept for later use. Parts of the document that are never rendered are never loaded, and a document that is only
+ partly used, e.g. one tag of it, is loaded faster.
+
+Validation errors of a lazily loaded part are raised when it's used, naming where in the document it is. load() with
+ strict=True loads all of the document up front instead, and raises the errors of all of it at once.
+"""
+
+from collections.abc import Mapping
+from typing import Callable, Iterator
+
+from marshmallow import Schema, ValidationError
+
+from openapi_to_asciidoc.ingest import COMPONENTS_SCHEMAS
+from openapi_to_asciidoc.objects import (
+    ComponentsObject,
+    ComponentsObjectSchema,
+    OpenApi,
+    OpenApiSchema,
+    OperationObjectSchema,
+    PathItemObject,
+    PathItemObjectSchema,
+    PathsItem,
+    PathsItemObjectSchema,
+    object_fields,
+)
+from openapi_to_asciidoc.split import OPERATIONS
+
+
+def located(error: ValidationError, location: tuple) -> ValidationError:
+    """Returns the error with its messages nested under the keys of location."""
+    messages = error.messages
+    for name in reversed(location):
+        messages = {name: messages}
+    return ValidationError(messages)
+
+
+class LoadedEntries(Mapping):
+    """
+    Read-only mapping of the entries of a JSON object that are loaded the first time they are accessed.
+
+    The decoded JSON of an entry is dropped once it's loaded, the loaded entry is kept instead. The validation errors
+     of an entry are raised with the same messages as when the whole document is loaded, the location is where the
+     map is in the messages, e.g. ("paths", "paths") for the path items.
+    """
+
+    def __init__(self, entries: dict, load: Callable, location: tuple):
+        self.entries = dict(entries)  # the decoded document itself is left as it is
+        self.load = load
+        self.location = location
+        self.loaded = {}
+
+    def __getitem__(self, key):
+        try:
+            return self.loaded[key]
+        except KeyError:
+            pass
+
+        location = self.location + (key, "value")  # the messages of a value of a Dict field
+        try:
+            entry = self.load(self.entries[key], location)
+        except ValidationError as error:
+            raise located(error, location) from error
+        self.loaded[key] = entry
+        self.entries[key] = None
+        return entry
+
+    def __iter__(self) -> Iterator:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class LazyPathItemObject(PathItemObject):
+    """A path item whose operations are loaded the first time they are accessed."""
+
+    __slots__ = ("_operations", "_location", "_schema")
+
+    def __init__(self, operations: dict, location: tuple, schema: Schema, **data):
+        super().__init__(**data)
+        for name in operations:
+            delattr(self, name)
+        self._operations = operations
+        self._location = location
+        self._schema = schema
+
+    def __getattr__(self, name: str):
+        # only called for the operations that aren't loaded yet, or for attributes that don't exist
+        if name not in OPERATIONS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        try:
+            operation = self._schema.load(self._operations[name])
+        except ValidationError as error:
+            raise located(error, self._location + (name,)) from error
+        setattr(self, name, operation)
+        del self._operations[name]
+        return operation
+
+
+def entry_loader(schema_class: type) -> Callable:
+    """
+    Returns a function that loads entries with a schema of its own.
+
+    Creating a schema takes far longer than loading a small object with it, so the schema is created once.
+    """
+    schema = schema_class()
+    return lambda data, location: schema.load(data)
+
+
+def path_item_loader() -> Callable:
+    """Returns a function that loads path items with schemas of its own, like entry_loader()."""
+    schema, operation_schema = PathItemObjectSchema(), OperationObjectSchema()
+
+    def load(data, location: tuple) -> PathItemObject:
+        if not isinstance(data, dict):
+            return schema.load(data)  # raises the validation error
+
+        operations = {name: data[name] for name in OPERATIONS if isinstance(data.get(name), dict)}
+        path_item = schema.load({key: value for key, value in data.items() if key not in operations})
+        return LazyPathItemObject(operations, location, operation_schema, **object_fields(path_item))
+
+    return load
+
+
+def load_paths(data: dict) -> PathsItem:
+    paths = {key: value for key, value in data.items() if key.startswith("/")}
+    try:
+        # validates what isn't loaded lazily, e.g. rejects invalid paths
+        rest: PathsItem = PathsItemObjectSchema().load({key: value for key, value in data.items() if key not in paths})
+    except ValidationError as error:
+        raise located(error, ("paths",)) from error
+
+    return PathsItem(paths=LoadedEntries(paths, path_item_loader(), ("paths", "paths")), x_variables=rest.x_variables)
+
+
+def load_components(data: dict) -> ComponentsObject:
+    maps = {name: data[name] for name in COMPONENTS_SCHEMAS if isinstance(data.get(name), dict)}
+    rest = {key: value for key, value in data.items() if key not in maps}
+    try:
+        components: ComponentsObject = ComponentsObjectSchema().load(rest)  # validates what isn't loaded lazily
+    except ValidationError as error:
+        raise located(error, ("components",)) from error
+
+    for name, entries in maps.items():
+        load = path_item_loader() if name == "pathItems" else entry_loader(COMPONENTS_SCHEMAS[name])
+        maps[name] = LoadedEntries(entries, load, ("components", name))
+    return ComponentsObject(**maps, x_variables=components.x_variables)
+
+
+def lazy_entries(openapi: OpenApi) -> list:
+    """Returns the lazily loaded maps of the document."""
+    maps = [openapi.paths.paths if openapi.paths else None, openapi.webhooks]
+    if openapi.components:
+        maps += object_fields(openapi.components).values()
+    return [entries for entries in maps if isinstance(entries, LoadedEntries)]
+
+
+def load_all(openapi: OpenApi):
+    """Load all lazily loaded parts of the document, and raise the validation errors of all of them at once."""
+    errors = {}
+    for entries in lazy_entries(openapi):
+        for key in entries:
+            try:
+                entry = entries[key]
+            except ValidationError as error:
+                merge_messages(errors, error.messages)
+                continue
+            for name in list(getattr(entry, "_operations", ())):
+                try:
+                    getattr(entry, name)
+                except ValidationError as error:
+                    merge_messages(errors, error.messages)
+    if errors:
+        raise ValidationError(errors)
+
+
+def merge_messages(messages: dict, other: dict):
+    for key, value in other.items():
+        if isinstance(value, dict) and isinstance(messages.get(key), dict):
+            merge_messages(messages[key], value)
+        else:
+            messages[key] = value
+
+
+def load(data: dict, strict: bool = False) -> OpenApi:
+    """
+    Load an OpenAPI specification lazily.
+
+    Parameters:
+    - data (dict): The decoded specification. Parts of it are changed while they are loaded, like OpenApiSchema().load()
+     changes them.
+    - strict (bool): Load and validate all of the document before returning it.
+
+    Returns:
+    - OpenApi: The document. Unless strict, its path items, webhooks, components and operations are loaded when used.
+
+    Raises:
+    - ValidationError: If the document is invalid. Unless strict, only its top level fields are validated up front.
+    """
+    large = {key: data[key] for key in ("paths", "webhooks", "components") if isinstance(data.get(key), dict)}
+    openapi: OpenApi = OpenApiSchema().load({key: value for key, value in data.items() if key not in large})
+
+    if "paths" in large:
+        openapi.paths = load_paths(large["paths"])
+    if "webhooks" in large:
+        openapi.webhooks = LoadedEntries(large["webhooks"], path_item_loader(), ("webhooks",))
+    if "components" in large:
+        openapi.components = load_components(large["components"])
+
+    if strict:
+        load_all(openapi)
+    return openapi
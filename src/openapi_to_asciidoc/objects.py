@@ -1,7 +1,9 @@
 # Copyright © LFV
-from marshmallow import Schema, ValidationError, fields, post_load, pre_load, validates, validate, EXCLUDE
+import functools
+from marshmallow import Schema, ValidationError, fields, post_load, pre_load, validates, validate, EXCLUDE, RAISE
 import re
-from openapi_to_asciidoc.render import render_object as jinja_render
+from typing import TextIO
+from openapi_to_asciidoc.render import render_object as jinja_render, stream_object as jinja_stream
 
 
 def filter_x_variables(data):
@@ -15,29 +17,66 @@ def filter_x_variables(data):
 
 
 # Base class that will use jinja to render the template.
+#  The template is rendered the first time the result is used, or written to a file as it's rendered with stream().
+#  The attributes of each class are declared in __slots__, which takes far less memory than a __dict__ per object
+#  for specifications with many objects.
 class RenderableObject:
+    __slots__ = ("template_name", "schema", "resolved", "_result", "__weakref__")
+
     def __init__(self, template_name: str, schema: Schema) -> str:
         self.template_name = template_name
         self.schema = schema
-        self.result = self.render()
+
+    @property
+    def result(self) -> str:
+        try:
+            return self._result
+        except AttributeError:
+            self._result = self.render()
+            return self._result
 
     def render(self) -> str:
         asciidoc_text = jinja_render(self.schema, self.template_name)
         return asciidoc_text
 
+    def stream(self, output: TextIO):
+        jinja_stream(self.schema, self.template_name, output)
+
+
+def object_fields(object: RenderableObject) -> dict:
+    """Returns the fields of an object by name, like vars() does for objects with a __dict__."""
+    return {name: getattr(object, name) for name in field_names(type(object))}
+
+
+@functools.cache
+def field_names(cls: type) -> tuple:
+    """Returns the slots of the class and its bases, except those of RenderableObject and private ones."""
+    names = []
+    for base in reversed(cls.__mro__[: cls.__mro__.index(RenderableObject)]):
+        names += [name for name in base.__dict__.get("__slots__", ()) if not name.startswith("_")]
+    return tuple(names)
+
 
 # Base class for objects that needs support for specification extensions.
 #  https://github.com/OAI/OpenAPI-Specification/blob/main/versions/3.1.0.md#specificationExtensions
+#  Unknown fields are excluded from the objects that a document can have any number of, e.g. path items and schemas.
+#  The objects that a document has at most one of, the document itself and its info, contact, license, paths,
+#  components and external docs, reject them. The rule only depends on the object, so every way of loading a
+#  document, whole, lazily, incrementally, in worker processes or partly from a cache, accepts the same documents.
 class SpecificationExtensions(Schema):
+    class Meta:
+        unknown = EXCLUDE  # exclude unknown variables
+
     x_variables = fields.Dict(keys=fields.Str(validate=validate.Regexp("^x-.*$")))
 
     @pre_load
     def preprocess_data(self, data, **kwargs):
-        self.unknown = EXCLUDE  # exclude unknown variables
         return filter_x_variables(data=data)
 
 
 class ContactObject(RenderableObject):
+    __slots__ = ("name", "url", "email", "x_variables")
+
     def __init__(self, **data):
         self.name = data.get("name")
         self.url = data.get("url")
@@ -47,6 +86,9 @@ class ContactObject(RenderableObject):
 
 
 class ContactObjectSchema(SpecificationExtensions):
+    class Meta:
+        unknown = RAISE  # a document has one of these, see SpecificationExtensions
+
     name = fields.Str()
     url = fields.Str()
     email = fields.Str()
@@ -57,6 +99,8 @@ class ContactObjectSchema(SpecificationExtensions):
 
 
 class LicenseObject(RenderableObject):
+    __slots__ = ("name", "url", "identifier", "x_variables")
+
     def __init__(self, **data):
         self.name = data.get("name")
         self.url = data.get("url")
@@ -66,6 +110,9 @@ class LicenseObject(RenderableObject):
 
 
 class LicenseObjectSchema(SpecificationExtensions):
+    class Meta:
+        unknown = RAISE  # a document has one of these, see SpecificationExtensions
+
     name = fields.Str()
     url = fields.Str()
     identifer = fields.Str()
@@ -76,6 +123,8 @@ class LicenseObjectSchema(SpecificationExtensions):
 
 
 class InfoObject(RenderableObject):
+    __slots__ = ("title", "summary", "description", "terms_of_service", "version", "contact", "license", "x_variables")
+
     def __init__(self, **data):
         self.title = data.get("title")
         self.summary = data.get("summary")
@@ -89,6 +138,9 @@ class InfoObject(RenderableObject):
 
 
 class InfoObjectSchema(SpecificationExtensions):
+    class Meta:
+        unknown = RAISE  # a document has one of these, see SpecificationExtensions
+
     title = fields.Str(required=True)
     summary = fields.Str()
     description = fields.Str()
@@ -103,6 +155,8 @@ class InfoObjectSchema(SpecificationExtensions):
 
 
 class ServerObject(RenderableObject):
+    __slots__ = ("url", "description", "variables", "x_variables")
+
     def __init__(self, **data):
         self.url = data.get("url")
         self.description = data.get("description")
@@ -112,6 +166,8 @@ class ServerObject(RenderableObject):
 
 
 class ServerVariableObject(RenderableObject):
+    __slots__ = ("enum", "default", "description", "x_variables")
+
     def __init__(self, **data):
         self.enum = data.get("enum")
         self.default = data.get("default")
@@ -155,6 +211,8 @@ class ExternalDocumentationSchema(Schema):
 
 
 class ExampleObject(RenderableObject):
+    __slots__ = ("description", "summary", "value", "externalValue")
+
     def __init__(self, **data):
         self.description = data.get("description")
         self.summary = data.get("summary")
@@ -179,6 +237,8 @@ class ExamplesObjectSchema(Schema):
 
 
 class XMLObject(RenderableObject):
+    __slots__ = ("name", "namespace", "prefix", "attribute", "wrapped", "x_variables")
+
     def __init__(self, **data):
         self.name = data.get("name")
         self.namespace = data.get("namespace")
@@ -202,6 +262,8 @@ class XMLObjectSchema(SpecificationExtensions):
 
 
 class DiscriminatorObject(RenderableObject):
+    __slots__ = ("property_name", "mapping", "x_variables")
+
     def __init__(self, **data):
         self.property_name = data.get("property_name")
         self.mapping = data.get("mapping")
@@ -219,6 +281,46 @@ class DiscriminatorObjectSchema(SpecificationExtensions):
 
 
 class SchemaObject(RenderableObject):
+    __slots__ = (
+        "title",
+        "multipleOf",
+        "maximum",
+        "exclusiveMaximum",
+        "minimum",
+        "exclusiveMinimum",
+        "maxLength",
+        "minLength",
+        "pattern",
+        "maxItems",
+        "minItems",
+        "uniqueItems",
+        "maxProperties",
+        "minProperties",
+        "required",
+        "enum",
+        "type",
+        "allOf",
+        "oneOf",
+        "anyOf",
+        "not_",
+        "items",
+        "properties",
+        "additionalProperties",
+        "description",
+        "format",
+        "default",
+        "nullable",
+        "readOnly",
+        "writeOnly",
+        "example",
+        "externalDocs",
+        "deprecated",
+        "xml",
+        "discriminator",
+        "ref",
+        "x_variables",
+    )
+
     def __init__(self, **data):
         self.title = data.get("title")
         self.multipleOf = data.get("multipleOf")
@@ -304,6 +406,8 @@ class SchemaObjectSchema(SpecificationExtensions):
 
 
 class MediaTypeObject(RenderableObject):
+    __slots__ = ("schema_object", "example", "examples", "encoding", "ref", "x_variables")
+
     def __init__(self, **data):
         self.schema_object = data.get("schema_object")
         self.example = data.get("example")
@@ -334,6 +438,18 @@ class MediaTypeObjectSchema(SpecificationExtensions):
 
 
 class LinkObject(RenderableObject):
+    __slots__ = (
+        "enum",
+        "operationRef",
+        "operationId",
+        "parameters",
+        "requestBody",
+        "description",
+        "server",
+        "ref",
+        "x_variables",
+    )
+
     def __init__(self, **data):
         self.enum = data.get("enum")
         self.operationRef = data.get("operationRef")
@@ -362,6 +478,22 @@ class LinkObjectSchema(SpecificationExtensions):
 
 
 class HeaderObject(RenderableObject):
+    __slots__ = (
+        "description",
+        "required",
+        "deprecated",
+        "allowEmptyValue",
+        "style",
+        "explode",
+        "allowReserved",
+        "schema_object",
+        "example",
+        "examples",
+        "content",
+        "ref",
+        "x_variables",
+    )
+
     def __init__(self, **data):
         self.description = data.get("description")
         self.required = data.get("required")
@@ -406,6 +538,8 @@ class HeaderObjectSchema(SpecificationExtensions):
 
 
 class EncodingObject(RenderableObject):
+    __slots__ = ("contentType", "headers", "style", "explode", "allowReserved", "ref")
+
     def __init__(self, **data):
         self.contentType = data.get("contentType")
         self.headers = data.get("headers")
@@ -430,6 +564,21 @@ class EncodingObjectSchema(Schema):
 
 
 class ParameterObject(RenderableObject):
+    __slots__ = (
+        "name",
+        "in_",
+        "description",
+        "required",
+        "deprecated",
+        "allowEmptyValue",
+        "style",
+        "allowReserved",
+        "schema_object",
+        "example",
+        "examples",
+        "ref",
+    )
+
     def __init__(self, **data):
         self.name = data.get("name")
         self.in_ = data.get("in_")
@@ -474,6 +623,8 @@ class ParameterObjectSchema(SpecificationExtensions):
 
 
 class ExternalDocsObject(RenderableObject):
+    __slots__ = ("description", "url", "x_variables")
+
     def __init__(self, **data):
         self.description = data.get("description")
         self.url = data.get("url")
@@ -491,6 +642,8 @@ class ExternalDocumentationObjectSchema(SpecificationExtensions):
 
 
 class ResponseObject(RenderableObject):
+    __slots__ = ("description", "headers", "content", "links", "ref", "x_variables")
+
     def __init__(self, **data):
         self.description = data.get("description")
         self.headers = data.get("headers")
@@ -514,6 +667,8 @@ class ResponseObjectSchema(SpecificationExtensions):
 
 
 class RequestBodyObject(RenderableObject):
+    __slots__ = ("description", "content", "required", "ref", "x_variables")
+
     def __init__(self, **data):
         self.description = data.get("description")
         self.content = data.get("content")
@@ -535,6 +690,8 @@ class RequestBodySchema(SpecificationExtensions):
 
 
 class SecuritySchemeObject(RenderableObject):
+    __slots__ = ("type", "description", "name", "in_", "scheme", "bearerFormat", "flows", "ref", "x_variables")
+
     def __init__(self, **data):
         self.type = data.get("type")
         self.description = data.get("description")
@@ -564,6 +721,8 @@ class SecuritySchemeObjectSchema(SpecificationExtensions):
 
 
 class OAuthFlowObject(RenderableObject):
+    __slots__ = ("authorizationUrl", "tokenUrl", "refreshUrl", "scopes", "x_variables")
+
     def __init__(self, **data):
         self.authorizationUrl = data.get("authorizationUrl")
         self.tokenUrl = data.get("tokenUrl")
@@ -585,6 +744,8 @@ class OAuthFlowObjectSchema(SpecificationExtensions):
 
 
 class OAuthFlowsObject(RenderableObject):
+    __slots__ = ("implicit", "password", "clientCredentials", "authorizationCode", "x_variables")
+
     def __init__(self, **data):
         self.implicit = data.get("implicit")
         self.password = data.get("password")
@@ -606,6 +767,8 @@ class OAuthFlowsObjectSchema(SpecificationExtensions):
 
 
 class SecurityRequirementObject(RenderableObject):
+    __slots__ = ("securitySchemeName", "securitySchemeType")
+
     def __init__(self, **data):
         self.securitySchemeName = data.get("securitySchemeName")
         self.securitySchemeType = data.get("securitySchemeType")
@@ -632,6 +795,8 @@ class SecurityRequirementObjectSchema(Schema):
 
 
 class CallbackObject(RenderableObject):
+    __slots__ = ("expression", "data_key", "ref")
+
     def __init__(self, **data):
         self.expression = data.get("expression")
         self.data_key = data.get("data_key")
@@ -640,13 +805,15 @@ class CallbackObject(RenderableObject):
 
 
 class CallbackObjectSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE  # exclude unknown variables
+
     expression = fields.Nested("PathItemObjectSchema")
     data_key = fields.String()
     ref = fields.String()
 
     @pre_load
     def map_expression(self, data, **kwargs):
-        self.unknown = EXCLUDE  # exclude unknown variables
         new_data = {}
         # remap data to fit the expression and ref key defined above
         # Necessary since keys are expressions and cannot be known before
@@ -666,6 +833,22 @@ class CallbackObjectSchema(Schema):
 
 
 class OperationObject(RenderableObject):
+    __slots__ = (
+        "tags",
+        "summary",
+        "description",
+        "externalDocs",
+        "operationId",
+        "parameters",
+        "requestBody",
+        "responses",
+        "callbacks",
+        "deprecated",
+        "security",
+        "servers",
+        "x_variables",
+    )
+
     def __init__(self, **data):
         self.tags = data.get("tags")
         self.summary = data.get("summary")
@@ -703,6 +886,21 @@ class OperationObjectSchema(SpecificationExtensions):
 
 
 class PathItemObject(RenderableObject):
+    __slots__ = (
+        "get",
+        "put",
+        "post",
+        "delete",
+        "options",
+        "head",
+        "patch",
+        "trace",
+        "servers",
+        "parameters",
+        "ref",
+        "x_variables",
+    )
+
     def __init__(self, **data):
         self.get = data.get("get")
         self.put = data.get("put")
@@ -738,6 +936,8 @@ class PathItemObjectSchema(SpecificationExtensions):
 
 
 class PathsItem(RenderableObject):
+    __slots__ = ("paths", "x_variables")
+
     def __init__(self, **data):
         self.paths = data.get("paths")
         self.x_variables = data.get("x_variables")
@@ -745,6 +945,9 @@ class PathsItem(RenderableObject):
 
 
 class PathsItemObjectSchema(SpecificationExtensions):
+    class Meta:
+        unknown = RAISE  # a document has one of these, see SpecificationExtensions
+
     paths = fields.Dict(
         keys=fields.Str(validate=lambda key: key.startswith("/")), values=fields.Nested(PathItemObjectSchema)
     )
@@ -761,6 +964,20 @@ class PathsItemObjectSchema(SpecificationExtensions):
 
 
 class ComponentsObject(RenderableObject):
+    __slots__ = (
+        "schemas",
+        "responses",
+        "parameters",
+        "examples",
+        "request_bodies",
+        "headers",
+        "security_schemes",
+        "links",
+        "callbacks",
+        "path_Items",
+        "x_variables",
+    )
+
     def __init__(self, **data):
         self.schemas = data.get("schemas")
         self.responses = data.get("responses")
@@ -777,6 +994,9 @@ class ComponentsObject(RenderableObject):
 
 
 class ComponentsObjectSchema(SpecificationExtensions):
+    class Meta:
+        unknown = RAISE  # a document has one of these, see SpecificationExtensions
+
     schemas = fields.Dict(keys=fields.String(), values=fields.Nested(SchemaObjectSchema))
     responses = fields.Dict(
         keys=fields.String(), values=fields.Nested(ResponseObjectSchema)
@@ -796,6 +1016,8 @@ class ComponentsObjectSchema(SpecificationExtensions):
 
 
 class TagObject(RenderableObject):
+    __slots__ = ("name", "description", "external_docs", "x_variables")
+
     def __init__(self, **data):
         self.name = data.get("name")
         self.description = data.get("description")
@@ -815,6 +1037,20 @@ class TagObjectSchema(SpecificationExtensions):
 
 
 class OpenApi(RenderableObject):
+    __slots__ = (
+        "open_api",
+        "info",
+        "jsonSchemaDialect",
+        "servers",
+        "paths",
+        "webhooks",
+        "components",
+        "security",
+        "tags",
+        "external_docs",
+        "x_variables",
+    )
+
     def __init__(self, **data):
         self.open_api = data.get("openapi")
         self.info = data.get("info")
@@ -831,6 +1067,9 @@ class OpenApi(RenderableObject):
 
 
 class OpenApiSchema(SpecificationExtensions):
+    class Meta:
+        unknown = RAISE  # a document has one of these, see SpecificationExtensions
+
     openapi = fields.Str()
     info = fields.Nested(InfoObjectSchema)
     jsonSchemaDialect = fields.Str()
@@ -840,7 +1079,8 @@ class OpenApiSchema(SpecificationExtensions):
     components = fields.Nested(ComponentsObjectSchema)
     security = fields.List(fields.Nested(SecurityRequirementObjectSchema))
     tags = fields.List(fields.Nested(TagObjectSchema))
-    external_docs = fields.Nested(ExternalDocumentationObjectSchema, data_key="externalDocs")
+    # operations, tags and schemas have external docs too
+    external_docs = fields.Nested(ExternalDocumentationObjectSchema, data_key="externalDocs", unknown=RAISE)
 
     @post_load
     def make_openapi(self, data, **kwargs):
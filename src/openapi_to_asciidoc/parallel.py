@@ -0,0 +1,151 @@
+# Copyright © LFV
+"""Spreads the work of a conversion over several processes."""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from marshmallow import ValidationError, fields
+
+from openapi_to_asciidoc import budget, decoding, examples, render
+from openapi_to_asciidoc.render import RenderedFragment
+from openapi_to_asciidoc.objects import ComponentsObject, ComponentsObjectSchema, OpenApi, OpenApiSchema
+
+# Smallest number of components loaded by a worker at a time, smaller shards cost more to send than to load.
+MIN_SHARD_SIZE = 50
+
+
+def executor(jobs: int) -> ProcessPoolExecutor:
+    """Returns a pool of worker processes with their template environment set up the same way as this process."""
+    configurations = (
+        render.configuration(),
+        decoding.configuration(),
+        examples.configuration(),
+        budget.configuration(),
+    )
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_configure, initargs=configurations)
+
+
+def _configure(
+    render_configuration: dict, decoding_configuration: dict, examples_configuration: dict, budget_configuration: dict
+):
+    render.configure(**render_configuration)
+    decoding.configure(**decoding_configuration)
+    examples.configure(**examples_configuration)
+    budget.configure(**budget_configuration)
+
+
+def render_path_items(openapi: OpenApi, jobs: int):
+    """
+    Render each path item and webhook of the document in a pool of worker processes.
+
+    The path items are replaced by their rendered fragments, so that rendering the document afterwards
+     stitches them together in their original order, with the same result as rendering them in this process.
+    """
+    path_items = []
+    if openapi.paths and openapi.paths.paths:
+        path_items += [(openapi.paths.paths, key) for key in openapi.paths.paths]
+    if openapi.webhooks:
+        path_items += [(openapi.webhooks, key) for key in openapi.webhooks]
+    # path items that were rendered before, e.g. found in a cache, are left as they are
+    path_items = [(mapping, key) for mapping, key in path_items if not isinstance(mapping[key], RenderedFragment)]
+
+    texts = render_fragments([(mapping[key], "path_item_obj.j2") for mapping, key in path_items], jobs=jobs)
+    for (mapping, key), text in zip(path_items, texts):
+        mapping[key] = RenderedFragment(text)
+
+
+def render_fragments(fragments: list, jobs: int) -> list:
+    """
+    Render objects with render.render_fragment() in a pool of worker processes.
+
+    Parameters:
+    - fragments (list): The objects to render, each with the name of its template.
+    - jobs (int): Number of worker processes, 1 to render in this process.
+
+    Returns:
+    - list: The rendered text of each object, in the same order.
+    """
+    if jobs <= 1 or len(fragments) <= 1:
+        return [render.render_fragment(object, template_name) for object, template_name in fragments]
+
+    objects = [object for object, _ in fragments]
+    template_names = [template_name for _, template_name in fragments]
+    chunksize = max(1, len(fragments) // (jobs * 4))
+    with executor(jobs) as pool:
+        return list(pool.map(render.render_fragment, objects, template_names, chunksize=chunksize))
+
+
+def load_openapi(data: dict, jobs: int) -> OpenApi:
+    """
+    Load a document like OpenApiSchema().load(), with the components loaded by a pool of worker processes.
+
+    Raises:
+    - ValidationError: With the same messages as OpenApiSchema().load().
+    """
+    if not isinstance(data.get("components"), dict):
+        return OpenApiSchema().load(data)
+
+    errors = {}
+    try:
+        openapi: OpenApi = OpenApiSchema().load({key: value for key, value in data.items() if key != "components"})
+    except ValidationError as error:
+        errors.update(error.messages)
+
+    try:
+        components = load_components(data["components"], jobs=jobs)
+    except ValidationError as error:
+        errors.update(error.messages)
+
+    if errors:
+        raise ValidationError(errors)
+
+    openapi.components = components
+    return openapi
+
+
+def load_components(data: dict, jobs: int) -> ComponentsObject:
+    """
+    Load a components object by splitting its maps into shards that are loaded in parallel and merged in order.
+
+    Raises:
+    - ValidationError: With the full key path of each error, starting at components.
+    """
+    schema = ComponentsObjectSchema()
+    maps = {
+        name: entries
+        for name, entries in data.items()
+        if isinstance(schema.fields.get(name), fields.Dict) and isinstance(entries, dict)
+    }
+
+    shards = []
+    for name, entries in maps.items():
+        size = max(MIN_SHARD_SIZE, -(-len(entries) // (jobs * 4)))
+        iterator = iter(entries.items())
+        while shard := dict(islice(iterator, size)):
+            shards.append((name, shard))
+
+    errors = {}
+    try:
+        rest: ComponentsObject = schema.load({key: value for key, value in data.items() if key not in maps})
+    except ValidationError as error:
+        errors.update(error.messages)
+
+    loaded = {name: {} for name in maps}
+    with executor(jobs) as pool:
+        for (name, _), (entries, messages) in zip(shards, pool.map(_load_components_shard, shards)):
+            loaded[name].update(entries)
+            if messages:
+                errors.setdefault(name, {}).update(messages)
+
+    if errors:
+        raise ValidationError({"components": errors})
+
+    return ComponentsObject(**loaded, x_variables=rest.x_variables)
+
+
+def _load_components_shard(shard: tuple) -> tuple:
+    name, entries = shard
+    try:
+        return ComponentsObjectSchema().fields[name].deserialize(entries), None
+    except ValidationError as error:
+        return {}, error.messages
@@ -0,0 +1,209 @@
+# Copyright © LFV
+"""Wall time, CPU time and peak memory of each phase of a conversion, and render time of each template.
+
+Phases are marked with phase(), which does nothing until enable() is called, so the marks cost next to nothing
+ when profiling is off. Peak memory is the largest amount of memory allocated by python during the phase, as
+ traced by tracemalloc, which is only started when profiling is enabled since tracing slows down the conversion.
+
+The render time of each template, and of each path, webhook and component, is measured by a TemplateProfiler,
+ which the templates are only instrumented for after enable_templates() is called.
+"""
+
+from collections import Counter
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+import json
+import time
+import tracemalloc
+from typing import Callable, ContextManager, Iterator, TextIO
+
+
+class NullProfiler:
+    """Stands in for a Profiler when profiling is off."""
+
+    _context = nullcontext()
+
+    def phase(self, name: str) -> ContextManager:
+        return self._context
+
+
+class Profiler:
+    """
+    Measures the phases of a conversion.
+
+    A phase that is entered several times, e.g. rendering with and without worker processes, is reported once with
+     the sum of its times and the highest peak memory.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.active = None
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self.active is not None:
+            yield  # part of the enclosing phase
+            return
+
+        self.active = name
+        tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.active = None
+            measurement = self.phases.setdefault(
+                name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_memory_bytes": 0}
+            )
+            measurement["wall_seconds"] += time.perf_counter() - wall
+            measurement["cpu_seconds"] += time.process_time() - cpu
+            measurement["peak_memory_bytes"] = max(measurement["peak_memory_bytes"], tracemalloc.get_traced_memory()[1])
+
+    def report(self) -> dict:
+        """Returns the measurements of each phase, in the order they were first entered, and of the whole run."""
+        peaks = [measurement["peak_memory_bytes"] for measurement in self.phases.values()]
+        peak_memory = max([tracemalloc.get_traced_memory()[1], *peaks])
+        return {
+            "phases": [{"name": name, **measurement} for name, measurement in self.phases.items()],
+            "total": {
+                "wall_seconds": time.perf_counter() - self.started,
+                "cpu_seconds": time.process_time() - self.started_cpu,
+                "peak_memory_bytes": peak_memory,
+            },
+        }
+
+    def write_report(self, output: TextIO):
+        json.dump(self.report(), output, indent=2)
+        output.write("\n")
+
+
+class TemplateProfiler:
+    """
+    Render calls and time of each template, and render time of each path item, webhook and component.
+
+    The inclusive time of a template is the time spent rendering it, including the templates it includes, and its
+     exclusive time leaves those out. A template that includes itself, like schema_obj.j2, is only counted once in
+     its inclusive time. The time of an object is the inclusive time of the template it's rendered with.
+    """
+
+    def __init__(self):
+        self.templates = {}
+        self.objects = Counter()
+        self.labels = {}
+        self.stack = []
+        self.active = Counter()
+        self.active_object = None
+
+    def label_objects(self, openapi):
+        """Name the path items, webhooks and components of the document, to measure their render time."""
+        from openapi_to_asciidoc.objects import object_fields  # objects imports this module through render
+
+        maps = {"paths": openapi.paths.paths if openapi.paths else None, "webhooks": openapi.webhooks}
+        if openapi.components:
+            maps.update((f"components.{name}", entries) for name, entries in object_fields(openapi.components).items())
+
+        for prefix, entries in maps.items():
+            if isinstance(entries, Mapping):
+                self.labels.update((id(entry), f"{prefix} {key}") for key, entry in entries.items())
+
+    def wrap(self, name: str, render_func: Callable) -> Callable:
+        """Returns a render function of a template that measures the time spent in render_func."""
+
+        def render(context):
+            label = self.labels.get(id(context.get("obj"))) if self.active_object is None else None
+            stats = self.templates.setdefault(name, {"calls": 0, "inclusive_seconds": 0.0, "exclusive_seconds": 0.0})
+            stats["calls"] += 1
+            events = render_func(context)
+            while True:
+                children = [0.0]
+                self.stack.append(children)
+                self.active[name] += 1
+                if label is not None:
+                    self.active_object = label
+                start = time.perf_counter()
+                try:
+                    event = next(events)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = time.perf_counter() - start
+                    self.stack.pop()
+                    self.active[name] -= 1
+                    stats["exclusive_seconds"] += elapsed - children[0]
+                    if not self.active[name]:
+                        stats["inclusive_seconds"] += elapsed
+                    if self.stack:
+                        self.stack[-1][0] += elapsed
+                    if label is not None:
+                        self.objects[label] += elapsed
+                        self.active_object = None
+                yield event
+
+        return render
+
+    def report(self, top: int) -> str:
+        """Returns the top templates by exclusive time and the top objects by render time as a table."""
+        lines = [f"{'Template':<40} {'calls':>8} {'inclusive ms':>14} {'exclusive ms':>14}"]
+        templates = sorted(self.templates.items(), key=lambda item: item[1]["exclusive_seconds"], reverse=True)
+        for name, stats in templates[:top]:
+            inclusive, exclusive = stats["inclusive_seconds"] * 1000, stats["exclusive_seconds"] * 1000
+            lines.append(f"{name:<40} {stats['calls']:>8} {inclusive:>14.2f} {exclusive:>14.2f}")
+
+        lines += ["", f"{'Object':<64} {'render ms':>14}"]
+        for label, seconds in self.objects.most_common(top):
+            lines.append(f"{label:<64} {seconds * 1000:>14.2f}")
+        return "\n".join(lines) + "\n"
+
+
+_profiler = NullProfiler()
+_template_profiler: TemplateProfiler = None
+
+
+def enable() -> Profiler:
+    """Start profiling the phases of this process."""
+    global _profiler
+
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    """Stop profiling, and tracing memory allocations if profiling started it."""
+    global _profiler
+
+    if isinstance(_profiler, Profiler):
+        _profiler.stop()
+    _profiler = NullProfiler()
+
+
+def phase(name: str) -> ContextManager:
+    """Returns a context manager that measures the code it runs as part of the named phase, if profiling."""
+    return _profiler.phase(name)
+
+
+def enable_templates() -> TemplateProfiler:
+    """Start measuring the render time of each template, for template environments created from now on."""
+    global _template_profiler
+
+    _template_profiler = TemplateProfiler()
+    return _template_profiler
+
+
+def disable_templates():
+    global _template_profiler
+
+    _template_profiler = None
+
+
+def template_profiler() -> TemplateProfiler:
+    """Returns the template profiler, None if templates aren't profiled."""
+    return _template_profiler
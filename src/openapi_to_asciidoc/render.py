@@ -1,34 +1,401 @@
 # Copyright © LFV
+from collections import OrderedDict
 from pathlib import Path
+import hashlib
+import json
 import logging
+import os
+import pickle
 import re
+import shutil
+import threading
+import weakref
+from typing import Iterable, Iterator, TextIO
 
+import jinja2
 from jinja2 import (
     BaseLoader,
+    ChoiceLoader,
     Environment,
+    FileSystemBytecodeCache,
     FileSystemLoader,
+    ModuleLoader,
     PackageLoader,
     Template,
     TemplateNotFound,
     select_autoescape,
 )
+from jinja2.runtime import new_context
+
+from openapi_to_asciidoc import budget, examples, profiling
+
+# Options the templates are compiled with. Precompiled templates are only valid for the same options.
+ENVIRONMENT_OPTIONS = dict(autoescape=select_autoescape(), trim_blocks=True, lstrip_blocks=True)
+
+# Templates compiled to python modules at build time, see hatch_build.py.
+COMPILED_TEMPLATES_DIR = Path(__file__).parent / "compiled_templates"
+MANIFEST_FILE = "manifest.json"
+
+# One environment is shared by every render in the process so that each template is only compiled once.
+#  It is created on first use, call configure() to change how it is set up.
+_environment: Environment = None
+_template_cache_dir: str = None
+_compiled_templates_dir: Path = COMPILED_TEMPLATES_DIR
+_fragment_cache: "FragmentCache" = None
+
+
+def configure(
+    template_cache_dir: str = None, compiled_templates_dir: str = COMPILED_TEMPLATES_DIR, fragment_cache_size: int = 0
+):
+    """
+    Configure the shared template environment.
+
+    Parameters:
+    - template_cache_dir (str): Directory where compiled template bytecode is stored between runs (default: no cache).
+    - compiled_templates_dir (str): Directory with precompiled templates, None to always compile from source.
+    - fragment_cache_size (int): Number of rendered fragments to keep for reuse by identical objects (default: none).
+
+    Any environment and fragment cache that have already been created are dropped and recreated.
+    """
+    global _environment, _template_cache_dir, _compiled_templates_dir, _fragment_cache
+
+    if template_cache_dir is not None:
+        os.makedirs(template_cache_dir, exist_ok=True)
+
+    _template_cache_dir = template_cache_dir
+    _compiled_templates_dir = compiled_templates_dir
+    _fragment_cache = FragmentCache(fragment_cache_size) if fragment_cache_size > 0 else None
+    _environment = None
+
+
+def configuration() -> dict:
+    """Returns the arguments to configure() that the shared environment is set up with, e.g. for worker processes."""
+    return {
+        "template_cache_dir": _template_cache_dir,
+        "compiled_templates_dir": _compiled_templates_dir,
+        "fragment_cache_size": _fragment_cache.max_size if _fragment_cache else 0,
+    }
+
+
+def fragment_cache() -> "FragmentCache":
+    """Returns the fragment cache of this process, None if fragments aren't cached."""
+    return _fragment_cache
+
+
+def get_source_loader() -> BaseLoader:
+    p = Path(__file__).parent / "templates"
+    if p.is_dir():
+        return FileSystemLoader(searchpath=p)
+
+    logging.info("Can't find local files. Uses package loader instead.")
+    return PackageLoader("openapi_to_asciidoc")
+
+
+def get_loader() -> BaseLoader:
+    source_loader = get_source_loader()
+    if _compiled_templates_dir is None:
+        return source_loader
+
+    manifest = read_manifest(_compiled_templates_dir)
+    if manifest is None:
+        return source_loader
+
+    return ChoiceLoader([PrecompiledLoader(_compiled_templates_dir, manifest, source_loader), source_loader])
+
+
+class PrecompiledLoader(ModuleLoader):
+    """
+    Loads templates that were compiled to python modules by compile_templates().
+
+    A template whose source has changed since it was compiled is reported as not found,
+     so that a ChoiceLoader falls back to the source template.
+    """
+
+    def __init__(self, path, manifest: dict, source_loader: BaseLoader):
+        super().__init__(path)
+        self.checksums = manifest["templates"]
+        self.source_loader = source_loader
+
+    def load(self, environment, name, globals=None):
+        source, _, _ = self.source_loader.get_source(environment, name)
+        if self.checksums.get(name) != checksum(source):
+            logging.info(f"Precompiled template {name} is missing or stale. Uses source template instead.")
+            raise TemplateNotFound(name)
+
+        return super().load(environment, name, globals)
+
+
+def checksum(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def manifest_header() -> dict:
+    options = {key: getattr(value, "__qualname__", repr(value)) for key, value in ENVIRONMENT_OPTIONS.items()}
+    return {"jinja2": jinja2.__version__, "options": options}
+
+
+def read_manifest(directory) -> dict:
+    """Returns the manifest of precompiled templates, or None if there are none usable by this environment."""
+    try:
+        with open(Path(directory) / MANIFEST_FILE) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if {key: manifest.get(key) for key in manifest_header()} != manifest_header():
+        logging.info("Precompiled templates were built with other options. Uses source templates instead.")
+        return None
+
+    return manifest
+
+
+def compile_templates(target=COMPILED_TEMPLATES_DIR):
+    """
+    Compile all templates to python modules that can be loaded without parsing the templates.
+
+    Parameters:
+    - target (str): Directory to write the compiled templates and their manifest to. Existing content is replaced.
+    """
+    environment = Environment(loader=get_source_loader(), **ENVIRONMENT_OPTIONS)
+    names = environment.list_templates(extensions=["j2"])
+
+    shutil.rmtree(target, ignore_errors=True)
+    environment.compile_templates(target, extensions=["j2"], zip=None, ignore_errors=False)
+
+    manifest = manifest_header()
+    manifest["templates"] = {name: checksum(environment.loader.get_source(environment, name)[0]) for name in names}
+    with open(Path(target) / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def get_environment() -> Environment:
+    global _environment
+
+    if _environment is None:
+        bytecode_cache = None
+        if _template_cache_dir is not None:
+            bytecode_cache = FileSystemBytecodeCache(directory=_template_cache_dir)
+
+        # The templates are part of the package and do not change while running,
+        #  so there is no need to check them for updates every time they are included.
+        _environment = Environment(
+            loader=get_loader(),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False,
+            **ENVIRONMENT_OPTIONS,
+        )
+        _environment.globals["fragment"] = render_fragment
+        _environment.globals["large_example"] = examples.render_large
+        if profiling.template_profiler() is not None:
+            _environment.template_class = ProfiledTemplate
+
+    return _environment
+
+
+class ProfiledTemplate(Template):
+    """A template whose render function is measured by the template profiler, whether it's rendered or included."""
+
+    @property
+    def root_render_func(self):
+        profiler = profiling.template_profiler()
+        if profiler is None:
+            return self._root_render_func
+        return profiler.wrap(self.name, self._root_render_func)
+
+    @root_render_func.setter
+    def root_render_func(self, render_func):
+        self._root_render_func = render_func
+
+
+class RenderedFragment:
+    """Stands in for an object whose template has already been rendered, e.g. in another process."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+SCALAR_TYPES = {str, int, float, bool, type(None)}
+
+
+class FragmentCache:
+    """
+    Rendered fragments, kept for objects that are identical to an object that has already been rendered.
+
+    Fragments are keyed by the template name and a structural hash of the object, so that separately loaded copies
+     of the same subtree share one entry. The least recently used fragment is dropped when max_size is reached.
+    """
+
+    def __init__(self, max_size: int):
+        from openapi_to_asciidoc.objects import RenderableObject, object_fields  # objects imports this module
+
+        self.max_size = max_size
+        self.fragments = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.object_type = RenderableObject
+        self.fields = object_fields
+        self.digests = weakref.WeakKeyDictionary()
+        self.hashing = set()
+        self.lock = threading.Lock()  # the service mode renders in several threads
+
+    def key(self, object, template_name: str) -> bytes:
+        """Returns the key of the object's fragment, or None if the object can't be hashed."""
+        try:
+            digest = self.digest(object)
+        except (pickle.PicklingError, TypeError, AttributeError, ValueError):
+            return None
+        return hashlib.sha256(template_name.encode("utf-8") + b"\0" + digest).digest()
+
+    def digest(self, object) -> bytes:
+        """
+        Returns a hash of the object's pickled state.
+
+        Nested objects are pickled as their own hash, so that each object is only pickled once however deep it is
+         nested. Attributes that are None are left out. The object a reference is resolved to is hashed with the
+         reference, since the same reference is resolved to different objects in different documents.
+         Raises ValueError for objects that contain themselves, also through a resolved reference.
+        """
+        if object in self.digests:
+            return self.digests[object]
+        if id(object) in self.hashing:
+            raise ValueError("Can't hash an object that contains itself")
+
+        self.hashing.add(id(object))
+        try:
+            state = {
+                key: value if type(value) in SCALAR_TYPES else self.state(value)
+                for key, value in self.fields(object).items()
+                if value is not None
+            }
+            resolved = getattr(object, "resolved", None)
+            if resolved is not None:
+                state["resolved"] = self.digest(resolved)
+        finally:
+            self.hashing.discard(id(object))
+
+        data = pickle.dumps((type(object).__qualname__, state), protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(data).digest()
+        self.digests[object] = digest
+        return digest
+
+    def state(self, value):
+        """Returns the value with the nested objects replaced by their hash."""
+        if isinstance(value, self.object_type):
+            return self.digest(value)
+        if type(value) is dict:
+            return {key: item if type(item) in SCALAR_TYPES else self.state(item) for key, item in value.items()}
+        if type(value) is list:
+            return [item if type(item) in SCALAR_TYPES else self.state(item) for item in value]
+        return value
+
+    def get(self, key: bytes) -> str:
+        with self.lock:
+            text = self.fragments.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.fragments.move_to_end(key)
+            return text
+
+    def put(self, key: bytes, text: str):
+        with self.lock:
+            self.fragments[key] = text
+            self.fragments.move_to_end(key)
+            if len(self.fragments) > self.max_size:
+                self.fragments.popitem(last=False)
+
+
+def render_fragment(object, template_name: str) -> str:
+    """
+    Render an object that is part of a larger document, available as fragment() in the templates.
+
+    The output isn't formatted, that is done once for the whole document.
+    """
+    if isinstance(object, RenderedFragment):
+        return object.text
+
+    if template_name == budget.SCHEMA_TEMPLATE and budget.limited():
+        # how far a nested schema is expanded depends on where it is, so only the outermost schema is cached
+        return budget.expand(
+            object,
+            render_top=lambda object: render_cached(object, template_name),
+            render_nested=lambda object: render_template(template_name, object),
+        )
+    return render_cached(object, template_name)
+
+
+def render_cached(object, template_name: str) -> str:
+    """Render an object with its template, or return the fragment of an identical object from the fragment cache."""
+    key = _fragment_cache.key(object, template_name) if _fragment_cache is not None else None
+    if key is None:
+        return render_template(template_name, object)
+
+    text = _fragment_cache.get(key)
+    if text is None:
+        text = render_template(template_name, object)
+        _fragment_cache.put(key, text)
+    return text
+
+
+def render_template(template_name: str, object) -> str:
+    """
+    Same as rendering the template with Template.render(obj=object), without its per call overhead.
+
+    The template context is created directly from the environment globals instead of being merged from the
+     template's globals, which costs more than rendering most of the small templates fragments are rendered with.
+    """
+    environment = get_environment()
+    template = environment.get_template(template_name)
+    context = new_context(environment, template.name, template.blocks, dict(environment.globals, obj=object), True)
+    try:
+        return environment.concat(template.root_render_func(context))
+    except Exception:
+        environment.handle_exception()
+
+
+def render_block(template_name: str, block_name: str, object, **variables) -> str:
+    """
+    Render one block of a template on its own, e.g. a section of the document.
+
+    Parameters:
+    - template_name (str): The template that defines the block.
+    - block_name (str): The name of the block.
+    - object: The object the block is rendered with, as obj.
+    - variables: Other variables the block uses, like the loop variables of a scoped block.
+
+    The output isn't formatted, like with render_fragment().
+    """
+    environment = get_environment()
+    template = environment.get_template(template_name)
+    context = new_context(
+        environment, template.name, template.blocks, dict(environment.globals, obj=object, **variables), True
+    )
+    try:
+        return environment.concat(template.blocks[block_name](context))
+    except Exception:
+        environment.handle_exception()
 
 
 def render_object(object, template: Template):
-    def load_template(loader: BaseLoader, template: Template) -> str:
-        template_env = Environment(loader=loader, autoescape=select_autoescape(), trim_blocks=True, lstrip_blocks=True)
-        template = template_env.get_template(template)
+    with profiling.phase("render"):
+        template = get_environment().get_template(template)
         output = template.render(obj=object)
+    with profiling.phase("format_output"):
         return format_output(output=output)
 
-    try:
-        p = Path(__file__).parent / "templates"
-        fs_loader = FileSystemLoader(searchpath=p)
-        return load_template(loader=fs_loader, template=template)
-    except TemplateNotFound:
-        logging.info("Can't find local files. Uses package loader instead.")
-        package_loader = PackageLoader("openapi_to_asciidoc")
-        return load_template(loader=package_loader, template=template)
+
+def stream_object(object, template: Template, output: TextIO, chunk_size: int = 64 * 1024):
+    """
+    Render the object and write the result to output while it is being rendered.
+
+    Gives the same result as render_object(), but only keeps about chunk_size characters of the result in memory.
+    """
+    with profiling.phase("render"):
+        template = get_environment().get_template(template)
+        for chunk in format_output_stream(template.generate(obj=object), chunk_size=chunk_size):
+            output.write(chunk)
 
 
 # Since Jinja is super unreliable with it's formatting,
@@ -36,3 +403,33 @@ def render_object(object, template: Template):
 # Makes for a much more readable file
 def format_output(output: str) -> str:
     return re.sub(r"\n{3,}", "\n\n", output)
+
+
+def format_output_stream(chunks: Iterable[str], chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Same as format_output() for output that is rendered in chunks.
+
+    Chunks are joined until they reach chunk_size. Newlines at the end of a chunk are held back and prepended
+     to the next one, so that a run of newlines is collapsed even when it's split between chunks.
+    """
+    newlines = 0
+    buffer = []
+    buffered = 0
+
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered < chunk_size:
+            continue
+
+        text = format_output("\n" * newlines + "".join(buffer))
+        stripped = text.rstrip("\n")
+        newlines = len(text) - len(stripped)
+        buffer = []
+        buffered = 0
+        if stripped:
+            yield stripped
+
+    text = format_output("\n" * newlines + "".join(buffer))
+    if text:
+        yield text
@@ -0,0 +1,136 @@
+# Copyright © LFV
+"""Resolution of the $ref values in a loaded document.
+
+Each distinct reference is resolved once, by following its JSON pointer through the loaded objects, and the
+ target object is shared by every object referring to it, instead of being copied. Pointers are looked up
+ segment by segment and every prefix is remembered, so resolving the references of a document is linear in its
+ size however often the same target is referenced.
+
+Only references within the document itself ("#/...") are resolved. References to other documents are left
+ as they are.
+"""
+
+import logging
+from typing import Iterator
+
+from openapi_to_asciidoc.objects import OpenApi, PathsItem, RenderableObject, object_fields
+
+# Pointer segments that are stored under another attribute name than their key in the specification.
+ATTRIBUTE_NAMES = {
+    "schema": "schema_object",
+    "not": "not_",
+    "requestBodies": "request_bodies",
+    "securitySchemes": "security_schemes",
+    "pathItems": "path_Items",
+}
+
+
+def reference(object) -> str:
+    """Returns the $ref value of the object, or None if it isn't a reference."""
+    ref = getattr(object, "ref", None)
+    ref = getattr(ref, "ref", ref)  # path items keep their $ref in a reference object
+    return ref if isinstance(ref, str) else None
+
+
+def unescape(segment: str) -> str:
+    return segment.replace("~1", "/").replace("~0", "~")
+
+
+def child(object, segment: str):
+    """Returns what the pointer segment points to in object, or None if there is nothing."""
+    if isinstance(object, PathsItem):
+        object = object.paths
+    if isinstance(object, dict):
+        return object.get(segment)
+    if isinstance(object, list):
+        return object[int(segment)] if segment.isdigit() and int(segment) < len(object) else None
+    if isinstance(object, RenderableObject):
+        return getattr(object, ATTRIBUTE_NAMES.get(segment, segment), None)
+    return None
+
+
+class ReferenceResolver:
+    """Resolves the JSON pointers of one document to its loaded objects."""
+
+    def __init__(self, openapi: OpenApi):
+        self.index = {"#": openapi}
+        self.targets = {}
+
+    def lookup(self, pointer: str):
+        """Returns the object the pointer points to, without following any reference it is."""
+        if pointer not in self.index:
+            parent, _, segment = pointer.rpartition("/")
+            if not parent:
+                return None
+            object = self.lookup(parent)
+            self.index[pointer] = None if object is None else child(object, unescape(segment))
+
+        return self.index[pointer]
+
+    def resolve(self, pointer: str):
+        """
+        Resolve a reference.
+
+        Returns:
+        - object: The object the reference points to, following references to references until an object that
+         isn't a reference. None if the pointer can't be resolved or is part of a cycle of references.
+        """
+        chain = []
+        while pointer not in self.targets:
+            if pointer in chain:
+                logging.warning(f"Cyclic reference {' -> '.join(chain + [pointer])} is not resolved.")
+                target = None
+                break
+
+            chain.append(pointer)
+            target = self.lookup(pointer)
+            next_pointer = reference(target)
+            if target is None:
+                logging.warning(f"Reference {pointer} points to nothing and is not resolved.")
+            if target is None or next_pointer is None or not next_pointer.startswith("#"):
+                break
+            pointer = next_pointer
+        else:
+            target = self.targets[pointer]
+
+        for link in chain:
+            self.targets[link] = target
+
+        return target
+
+
+def walk(openapi: OpenApi) -> Iterator[RenderableObject]:
+    """Returns every object of the document once."""
+    seen = set()
+    stack = [openapi]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, RenderableObject):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            yield value
+            stack += object_fields(value).values()
+        elif isinstance(value, dict):
+            stack += value.values()
+        elif isinstance(value, list):
+            stack += value
+
+
+def resolve_references(openapi: OpenApi) -> ReferenceResolver:
+    """
+    Resolve all references within the document.
+
+    Every object with a $ref gets the object it refers to as its resolved attribute, or None if it can't be
+     resolved. Objects referring to the same target share the same object.
+
+    Returns:
+    - ReferenceResolver: The resolver, with each resolved pointer in its targets.
+    """
+    resolver = ReferenceResolver(openapi)
+    for object in list(walk(openapi)):
+        pointer = reference(object)
+        if pointer is not None and pointer.startswith("#"):
+            object.resolved = resolver.resolve(pointer)
+
+    return resolver
@@ -0,0 +1,394 @@
+# Copyright © LFV
+"""Service mode, that converts the specifications sent to it over HTTP.
+
+`o2a serve` keeps running with the templates compiled, so a conversion doesn't pay for starting python and
+ compiling the templates. A specification is POSTed to /convert and its
+ AsciiDoc is streamed back while it's rendered. The options of the conversion are given as query parameters:
+
+    curl --data-binary @openapi.json "http://localhost:8080/convert?include-tags=pets,store&resolve-refs=true"
+
+At most `workers` specifications are converted at once and up to `queue_size` more wait for a worker. Requests
+ beyond that are answered with 503 Service Unavailable and a Retry-After header right away, instead of piling up.
+ Results are kept by a hash of the specification and the options, and sent again without converting when the
+ same specification is converted again. GET /health reports the state of the service as JSON.
+"""
+
+import argparse
+from collections import OrderedDict
+import hashlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from functools import partial
+import logging
+import sys
+import threading
+from typing import BinaryIO, Callable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import budget, convert, decoding, examples, render, subset
+from openapi_to_asciidoc.objects import OpenApi
+
+# Query parameters of /convert whose values are comma separated lists, and the Selection argument of each.
+SELECTION_PARAMETERS = {"include-tags": "tags", "include-paths": "paths", "include-operations": "operations"}
+FLAG_PARAMETERS = ("resolve-refs",)
+
+
+class Options:
+    """The options of a conversion, from the query parameters of a request."""
+
+    def __init__(self, query: str):
+        parameters = parse_qs(query, keep_blank_values=True)
+        unknown = set(parameters) - set(SELECTION_PARAMETERS) - set(FLAG_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+
+        self.selection = subset.Selection(
+            **{
+                argument: [value for values in parameters[name] for value in values.split(",") if value]
+                for name, argument in SELECTION_PARAMETERS.items()
+                if name in parameters
+            }
+        )
+        self.resolve_refs = parameters.get("resolve-refs", ["false"])[-1].lower() in ("", "1", "true", "yes")
+
+    def key(self) -> bytes:
+        """Returns what identifies the options in the key of a cached result."""
+        selection = {name: sorted(values or []) for name, values in vars(self.selection).items()}
+        return json.dumps([selection, self.resolve_refs], sort_keys=True).encode("utf-8")
+
+
+class ResultCache:
+    """Converted specifications, keyed by a hash, of which the least recently used are dropped beyond max_bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.results = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self.lock:
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.results.move_to_end(key)
+            return result
+
+    def put(self, key: bytes, result: bytes):
+        if len(result) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.results:
+                return
+            self.results[key] = result
+            self.size += len(result)
+            while self.size > self.max_bytes:
+                self.size -= len(self.results.popitem(last=False)[1])
+
+
+class ChunkedWriter:
+    """Writes the text written to it as chunks of an HTTP response with chunked transfer encoding."""
+
+    def __init__(self, output: BinaryIO, keep: bool):
+        self.output = output
+        self.chunks: List[bytes] = [] if keep else None
+
+    def write(self, text: str):
+        data = text.encode("utf-8")
+        if not data:
+            return
+        self.output.write(b"%x\r\n%s\r\n" % (len(data), data))
+        if self.chunks is not None:
+            self.chunks.append(data)
+
+    def close(self):
+        self.output.write(b"0\r\n\r\n")
+
+
+class ConversionService:
+    """
+    Converts specifications with a bounded number of workers.
+
+    Requests are handled in threads of their own, and each waits for one of the workers to be free before it loads
+     its specification with a new schema and renders it, the same way as a conversion on the command line does.
+     The workers are threads of the same process, so they render under the GIL: the number of workers bounds how
+     many specifications are converted at once, and the memory that takes, but doesn't add CPU parallelism.
+
+    Parameters:
+    - workers (int): Number of specifications that are converted at once.
+    - queue_size (int): Number of requests that may wait for a worker before requests are turned away.
+    - cache_size (int): Bytes of converted specifications to keep for reuse, 0 to not keep any.
+    - load (Callable): Loads a decoded specification, convert.load_schema() with its options (default: no options).
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 16, cache_size: int = 0, load: Callable = None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.load_schema = load or convert.load_schema
+        self.free = threading.BoundedSemaphore(workers)
+        self.admitted = threading.BoundedSemaphore(workers + queue_size)
+        self.results = ResultCache(cache_size) if cache_size > 0 else None
+        self.lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.converted = 0
+        self.rejected = 0
+
+    def warm_up(self):
+        """Compile all templates before the first request."""
+        environment = render.get_environment()
+        for name in render.get_source_loader().list_templates():
+            if name.endswith(".j2"):
+                environment.get_template(name)
+
+    def count(self, name: str, change: int = 1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + change)
+
+    def admit(self) -> bool:
+        """Returns True if the request may wait for a worker, False if it must be turned away."""
+        if self.admitted.acquire(blocking=False):
+            return True
+        self.count("rejected")
+        return False
+
+    def load(self, data: dict, options: Options) -> OpenApi:
+        data = convert.select_operations(data, options.selection)
+        return convert.prepare_schema(data, self.load_schema, resolve_refs=options.resolve_refs)
+
+    def health(self) -> dict:
+        with self.lock:
+            health = {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "active": self.active,
+                "waiting": self.waiting,
+                "converted": self.converted,
+                "rejected": self.rejected,
+            }
+        if self.results is not None:
+            health["cache"] = {"bytes": self.results.size, "hits": self.results.hits, "misses": self.results.misses}
+        return health
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Handles the requests to a ConversionService, which is an attribute of the server."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "o2a"
+
+    def log_message(self, format: str, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+    def send_text(self, status: HTTPStatus, text: str, content_type: str, headers: Optional[dict] = None):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.release_admission()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: HTTPStatus, messages, headers: Optional[dict] = None):
+        self.send_text(status, json.dumps({"error": messages}), "application/json", headers)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/health":
+            return self.send_error_json(HTTPStatus.NOT_FOUND, "Not found")
+        self.send_text(HTTPStatus.OK, json.dumps(self.server.service.health()), "application/json")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/convert":
+            return self.send_error_json(HTTPStatus.NOT_FOUND, "Not found")
+        try:
+            options = Options(url.query)
+            length = int(self.headers["Content-Length"])
+            if length < 0:
+                raise ValueError("Content-Length can't be negative")
+        except (TypeError, ValueError) as error:
+            self.close_connection = True  # the body, if any, isn't read
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, str(error) or "Content-Length is required")
+
+        service: ConversionService = self.server.service
+        if not service.admit():
+            self.close_connection = True
+            return self.send_error_json(HTTPStatus.SERVICE_UNAVAILABLE, "Too many requests", {"Retry-After": "1"})
+        self.admission = service.admitted
+        try:
+            self.convert(service, self.rfile.read(length), options)
+        finally:
+            self.release_admission()
+
+    def release_admission(self):
+        """Let another request in, before the end of the response, so that a client's next request isn't refused."""
+        admission, self.admission = getattr(self, "admission", None), None
+        if admission is not None:
+            admission.release()
+
+    def convert(self, service: ConversionService, body: bytes, options: Options):
+        key = hashlib.sha256(options.key() + b"\0" + body).digest()
+        result = service.results.get(key) if service.results is not None else None
+        if result is not None:
+            return self.send_text(HTTPStatus.OK, result.decode("utf-8"), "text/asciidoc; charset=utf-8")
+
+        service.count("waiting")
+        service.free.acquire()
+        service.count("waiting", -1)
+        service.count("active")
+        try:
+            output = self.render(service, body, options)
+        finally:
+            service.count("active", -1)
+            service.free.release()
+
+        if output is None:
+            return
+        if output.chunks is not None:
+            service.results.put(key, b"".join(output.chunks))  # before the response ends, for the next request
+        self.release_admission()
+        output.close()
+
+    def render(self, service: ConversionService, body: bytes, options: Options) -> Optional[ChunkedWriter]:
+        try:
+            data = decoding.loads(body)
+        except ValueError as error:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {error}")
+            return None
+        if not isinstance(data, dict):
+            self.send_error_json(HTTPStatus.UNPROCESSABLE_ENTITY, "The specification must be a JSON object")
+            return None
+        try:
+            openapi = service.load(data, options)
+        except ValidationError as error:
+            self.send_error_json(HTTPStatus.UNPROCESSABLE_ENTITY, error.messages)
+            return None
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/asciidoc; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        output = ChunkedWriter(self.wfile, keep=service.results is not None)
+        try:
+            openapi.stream(output)
+        except Exception:
+            # the status has been sent, ending the response early is the only way left to tell that it failed
+            self.close_connection = True
+            raise
+        service.count("converted")
+        return output
+
+
+def create_server(host: str, port: int, service: ConversionService) -> ThreadingHTTPServer:
+    """Returns a server of the service, listening on host and port, 0 for any free port."""
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def get_arguments(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="o2a serve", description="Convert OpenAPI specifications sent over HTTP")
+    parser.add_argument("--host", help="Address to listen on (default: 127.0.0.1)", default="127.0.0.1")
+    parser.add_argument("--port", help="Port to listen on (default: 8080)", type=int, default=8080)
+    parser.add_argument("--workers", help="Specifications converted at once (default: 4)", type=int, default=4)
+    parser.add_argument(
+        "--queue-size",
+        help="Requests that may wait for a worker before requests are turned away with 503 (default: 16)",
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        "--cache-size",
+        help="Megabytes of converted specifications kept for repeated requests (default: 64, 0 for none)",
+        type=float,
+        default=64,
+    )
+    parser.add_argument(
+        "--fragment-cache-size",
+        help="Number of rendered fragments to reuse for identical objects, shared by all requests (default: 0)",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--template-cache-dir",
+        help="Directory where compiled templates are cached between runs (default: no cache)",
+        default=None,
+    )
+    parser.add_argument(
+        "--fast-load",
+        help="Load the specifications with generated deserializers instead of marshmallow's generic loading",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--max-example-bytes",
+        help="Example values whose JSON is larger than N bytes are summarized with the start of it (default: no limit)",
+        metavar="N",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--max-schema-depth",
+        help="Levels of nested schemas that are expanded below a schema, deeper ones are rendered as a "
+        "cross-reference (default: no limit)",
+        metavar="N",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--max-schema-nodes",
+        help="Schemas that are expanded for a schema, itself included, the rest of them are rendered as a "
+        "cross-reference (default: no limit)",
+        metavar="N",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--json-backend",
+        help="JSON library to decode the specifications with, auto for the fastest that is installed (default: auto)",
+        choices=["auto", *decoding.BACKENDS],
+        default="auto",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.queue_size < 0 or args.cache_size < 0 or args.fragment_cache_size < 0:
+        parser.error("--workers must be at least 1, and the queue and cache sizes can't be negative")
+    if args.max_example_bytes is not None and args.max_example_bytes < 1:
+        parser.error("--max-example-bytes must be at least 1")
+    if (args.max_schema_depth or 0) < 0 or (args.max_schema_nodes is not None and args.max_schema_nodes < 1):
+        parser.error("--max-schema-depth can't be negative and --max-schema-nodes must be at least 1")
+    if args.json_backend not in ("auto", *decoding.available_backends()):
+        parser.error(f"--json-backend {args.json_backend} isn't installed")
+    return args
+
+
+def main(argv: List[str]) -> int:
+    args = get_arguments(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    decoding.configure(args.json_backend)
+    render.configure(template_cache_dir=args.template_cache_dir, fragment_cache_size=args.fragment_cache_size)
+    examples.configure(args.max_example_bytes)
+    budget.configure(max_depth=args.max_schema_depth, max_nodes=args.max_schema_nodes)
+    load = partial(convert.load_schema, fast_load=args.fast_load)
+    service = ConversionService(args.workers, args.queue_size, int(args.cache_size * 1024 * 1024), load=load)
+    service.warm_up()
+
+    server = create_server(args.host, args.port, service)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port}/convert, press Ctrl+C to stop", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
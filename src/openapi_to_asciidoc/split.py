@@ -0,0 +1,197 @@
+# Copyright © LFV
+"""Output split into several files, with a master file that includes them.
+
+The info and servers, each path or tag group, the webhooks, each section of the components and the rest of the
+ document are rendered to files of their own, from the blocks of openapi_obj.j2, paths_obj.j2 and
+ components_obj.j2. The master file has the section headings and an include:: directive for each of the files.
+
+A file is only written if its content changed, so tools that rebuild what changed since the last run, going by
+ the modification times, only process the files of the parts of the specification that changed.
+"""
+
+from pathlib import Path
+import os
+import re
+import tempfile
+from typing import List, Tuple
+
+from openapi_to_asciidoc import render
+from openapi_to_asciidoc.objects import OpenApi
+
+# Blocks of components_obj.j2, in the order they are rendered.
+COMPONENTS_BLOCKS = (
+    "paths",
+    "schemas",
+    "responses",
+    "parameters",
+    "examples",
+    "request_bodies",
+    "headers",
+    "security_schemes",
+    "links",
+    "callbacks",
+    "extensions",
+)
+
+# Operations of a path item, in the order path_item_obj.j2 renders them.
+OPERATIONS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Group of the paths without any tagged operations when the paths are split by tag.
+UNTAGGED_GROUP = "default"
+
+
+def slug(name: str) -> str:
+    """Returns a file name for a path or tag, e.g. pets-petId for /pets/{petId}."""
+    return re.sub(r"[^A-Za-z0-9_.]+", "-", name).strip("-.") or "root"
+
+
+def unique_slugs(names: List[str]) -> dict:
+    """Returns a file name for each name, with a number added to names that would end up with the same file."""
+    slugs = {}
+    used = set()
+    for name in names:
+        candidate = base = slug(name)
+        number = 1
+        while candidate.lower() in used:
+            number += 1
+            candidate = f"{base}-{number}"
+        used.add(candidate.lower())
+        slugs[name] = candidate
+    return slugs
+
+
+def path_tag(path_item) -> str:
+    """Returns the first tag of the first operation of a path item in the JSON specification."""
+    if isinstance(path_item, dict):
+        for method in OPERATIONS:
+            operation = path_item.get(method)
+            if isinstance(operation, dict) and isinstance(operation.get("tags"), list) and operation["tags"]:
+                return str(operation["tags"][0])
+    return UNTAGGED_GROUP
+
+
+def path_groups(paths: List[str], data: dict, by: str) -> dict:
+    """
+    Group the paths into the files they are written to.
+
+    Parameters:
+    - paths (list): The paths of the document, in order.
+    - data (dict): The JSON specification, for the tags of the operations.
+    - by (str): path for a file per path, tag for a file per tag of the first operation of each path.
+
+    Returns:
+    - dict: The paths of each group, keyed by the name of the group, in order of the first path of each group.
+    """
+    if by == "path":
+        return {path: [path] for path in paths}
+
+    json_paths = data.get("paths") if isinstance(data.get("paths"), dict) else {}
+    groups = {}
+    for path in paths:
+        groups.setdefault(path_tag(json_paths.get(path)), []).append(path)
+    return groups
+
+
+def document_parts(openapi: OpenApi, data: dict, by: str = "path") -> List[Tuple[str, str]]:
+    """
+    Render the document in parts.
+
+    Parameters:
+    - openapi (OpenApi): The loaded specification.
+    - data (dict): The JSON specification, for the tags of the operations.
+    - by (str): path or tag, what the paths are split by.
+
+    Returns:
+    - list: The file name of each part, relative to the directory of the parts, with its text. Section headings
+     that belong in the master file have None as file name.
+    """
+    parts = [("info.adoc", render.render_block("openapi_obj.j2", "info", openapi))]
+
+    if openapi.paths:
+        parts.append((None, render.render_block("openapi_obj.j2", "paths_heading", openapi)))
+        paths = openapi.paths.paths or {}
+        groups = path_groups(list(paths), data, by)
+        directory = "paths" if by == "path" else "tags"
+        for group, file_name in unique_slugs(list(groups)).items():
+            text = "".join(
+                render.render_block("paths_obj.j2", "path", openapi.paths, path=path, path_obj=paths[path])
+                for path in groups[group]
+            )
+            parts.append((f"{directory}/{file_name}.adoc", text))
+        parts.append(("paths-extensions.adoc", render.render_block("paths_obj.j2", "extensions", openapi.paths)))
+
+    parts.append(("webhooks.adoc", render.render_block("openapi_obj.j2", "webhooks", openapi)))
+
+    if openapi.components:
+        parts.append((None, render.render_block("openapi_obj.j2", "components_heading", openapi)))
+        for block in COMPONENTS_BLOCKS:
+            text = render.render_block("components_obj.j2", block, openapi.components)
+            parts.append((f"components/{block.replace('_', '-')}.adoc", text))
+
+    for block in ("security", "tags", "external_docs", "extensions"):
+        parts.append((f"{block.replace('_', '-')}.adoc", render.render_block("openapi_obj.j2", block, openapi)))
+
+    formatted = [(file_name, render.format_output(text).strip("\n")) for file_name, text in parts]
+    return [(file_name, text + "\n") for file_name, text in formatted if text]
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """
+    Write text to the file, unless it already has that content.
+
+    Returns:
+    - bool: True if the file was written.
+    """
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+
+    os.makedirs(path.parent, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return True
+
+
+def write_split(openapi: OpenApi, data: dict, output_path: str, by: str = "path") -> Tuple[int, int]:
+    """
+    Write the document as a master file that includes a file per part.
+
+    The parts are written to a directory next to the master file, named after it, e.g. api/ for api.adoc.
+     AsciiDoc files in that directory that are no longer part of the document are removed.
+
+    Parameters:
+    - openapi (OpenApi): The loaded specification.
+    - data (dict): The JSON specification, for the tags of the operations.
+    - output_path (str): The master file.
+    - by (str): path or tag, what the paths are split by.
+
+    Returns:
+    - tuple: The number of files that were written, and the number of files that were already up to date.
+    """
+    master = Path(output_path)
+    directory = master.parent / master.stem
+    lines = []
+    files = {}
+    for file_name, text in document_parts(openapi, data, by=by):
+        if file_name is None:
+            lines.append(text)
+        else:
+            lines.append(f"include::{master.stem}/{file_name}[]\n")
+            files[directory / file_name] = text
+    files[master] = "\n".join(lines)
+
+    written = sum(write_if_changed(path, text) for path, text in files.items())
+
+    for path in directory.rglob("*.adoc"):
+        if path not in files:
+            path.unlink()
+
+    return written, len(files) - written
@@ -0,0 +1,211 @@
+# Copyright © LFV
+"""A part of a specification, selected by tag, path and operationId.
+
+The decoded JSON is pruned before it's loaded: operations that aren't selected are removed, and so are path items
+ and webhooks without any selected operations. Of the components, only those that the kept operations use are kept,
+ directly or through other components, by $ref or, for security schemes, by name. Loading and rendering then
+ only takes time and memory in proportion to the part that is kept.
+"""
+
+from fnmatch import fnmatchcase
+from typing import Iterator, List, Optional
+from urllib.parse import unquote
+
+from openapi_to_asciidoc.split import OPERATIONS
+
+COMPONENTS_REFERENCE = "#/components/"
+
+
+class Selection:
+    """
+    The operations to keep. An operation is kept if it matches each of the filters that are given.
+
+    Parameters:
+    - tags (list): Tags, one of which the operation must have.
+    - paths (list): Glob patterns, e.g. /pets/*, one of which the path or webhook name of the operation must match.
+    - operations (list): operationIds, one of which the operation must have.
+    """
+
+    def __init__(
+        self,
+        tags: Optional[List[str]] = None,
+        paths: Optional[List[str]] = None,
+        operations: Optional[List[str]] = None,
+    ):
+        self.tags = set(tags) if tags else None
+        self.paths = list(paths) if paths else None
+        self.operations = set(operations) if operations else None
+
+    def __bool__(self) -> bool:
+        return self.tags is not None or self.paths is not None or self.operations is not None
+
+    def matches(self, path: str, operation: dict) -> bool:
+        if self.paths is not None and not any(fnmatchcase(path, pattern) for pattern in self.paths):
+            return False
+        if self.tags is not None:
+            tags = operation.get("tags")
+            if not isinstance(tags, list) or self.tags.isdisjoint(tag for tag in tags if isinstance(tag, str)):
+                return False
+        return self.operations is None or operation.get("operationId") in self.operations
+
+
+def referenced_path_item(path_item: dict, components) -> dict:
+    """Returns the component path item that a path item refers to by $ref, the path item itself if it isn't a ref."""
+    seen = set()
+    while isinstance(path_item.get("$ref"), str) and path_item["$ref"] not in seen:
+        seen.add(path_item["$ref"])
+        key = component_key(path_item["$ref"])
+        section = components.get("pathItems") if isinstance(components, dict) else None
+        if key is None or key[0] != "pathItems" or not isinstance(section, dict):
+            break
+        if not isinstance(section.get(key[1]), dict):
+            break
+        path_item = section[key[1]]
+    return path_item
+
+
+def select_path_items(path_items, selection: Selection, components=None) -> dict:
+    """
+    Returns the path items with only the selected operations, leaving out those without any.
+
+    A path item that refers to one of the components by $ref is kept as it is if any of the operations of the
+     component is selected, the component is shared and kept with all of its operations.
+    """
+    if not isinstance(path_items, dict):
+        return path_items
+
+    selected = {}
+    for path, path_item in path_items.items():
+        if not isinstance(path_item, dict) or path.startswith("x-"):
+            selected[path] = path_item
+            continue
+        if "$ref" in path_item:
+            target = referenced_path_item(path_item, components)
+            operations = [target[method] for method in OPERATIONS if isinstance(target.get(method), dict)]
+            if any(selection.matches(path, operation) for operation in operations):
+                selected[path] = path_item
+            continue
+
+        operations = [method for method in OPERATIONS if isinstance(path_item.get(method), dict)]
+        kept = [method for method in operations if selection.matches(path, path_item[method])]
+        if kept:
+            selected[path] = {key: value for key, value in path_item.items() if key in kept or key not in operations}
+    return selected
+
+
+def references(value) -> Iterator[str]:
+    """Returns the $ref values within a JSON value, and the schema references of discriminator mappings."""
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            if isinstance(value.get("$ref"), str):
+                yield value["$ref"]
+            discriminator = value.get("discriminator")
+            if isinstance(discriminator, dict) and isinstance(discriminator.get("mapping"), dict):
+                yield from (ref for ref in discriminator["mapping"].values() if isinstance(ref, str))
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+
+
+def security_schemes(value) -> Iterator[str]:
+    """Returns the names of the security schemes used by the security requirements within a JSON value."""
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            if isinstance(value.get("security"), list):
+                for requirement in value["security"]:
+                    if isinstance(requirement, dict):
+                        yield from requirement
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+
+
+def component_key(ref: str) -> Optional[tuple]:
+    """
+    Returns the section and name of the component that a reference refers to or into, e.g. ("schemas", "Pet") for
+     #/components/schemas/Pet/properties/name, None for other refs.
+    """
+    if not ref.startswith(COMPONENTS_REFERENCE):
+        return None
+    parts = ref.split("/")[2:4]
+    if len(parts) != 2:
+        return None
+    return tuple(unquote(part).replace("~1", "/").replace("~0", "~") for part in parts)
+
+
+def reachable_components(roots: list, components: dict) -> dict:
+    """Returns the names of the components in each section that the roots use, directly or through other components."""
+    reachable = {}
+    pending = list(roots)
+    while pending:
+        value = pending.pop()
+        keys = [component_key(ref) for ref in references(value)]
+        keys += [("securitySchemes", name) for name in security_schemes(value)]
+        for key in keys:
+            if key is None or key[1] in reachable.get(key[0], ()):
+                continue
+            section = components.get(key[0])
+            if isinstance(section, dict) and key[1] in section:
+                reachable.setdefault(key[0], set()).add(key[1])
+                pending.append(section[key[1]])
+    return reachable
+
+
+def used_tags(path_items: list) -> set:
+    tags = set()
+    for path_item in path_items:
+        for method in OPERATIONS:
+            operation = path_item.get(method) if isinstance(path_item, dict) else None
+            if isinstance(operation, dict) and isinstance(operation.get("tags"), list):
+                tags.update(tag for tag in operation["tags"] if isinstance(tag, str))
+    return tags
+
+
+def subset(data: dict, selection: Selection) -> dict:
+    """
+    Prune a specification to the selected operations and the components they use.
+
+    Parameters:
+    - data (dict): The decoded specification, which is left as it is.
+    - selection (Selection): The operations to keep.
+
+    Returns:
+    - dict: The pruned specification. The tags listed at the top level are those of the kept operations.
+    """
+    if not isinstance(data, dict):
+        return data  # not a specification, left for the caller to reject
+
+    pruned = dict(data)
+    components = pruned.get("components")
+    for name in ("paths", "webhooks"):
+        if name in pruned:
+            pruned[name] = select_path_items(pruned[name], selection, components)
+
+    path_items = [
+        path_item
+        for name in ("paths", "webhooks")
+        if isinstance(pruned.get(name), dict)
+        for key, path_item in pruned[name].items()
+        if not key.startswith("x-")
+    ]
+    if isinstance(pruned.get("tags"), list):
+        tags = used_tags(
+            [referenced_path_item(item, components) if isinstance(item, dict) else item for item in path_items]
+        )
+        pruned["tags"] = [tag for tag in pruned["tags"] if not isinstance(tag, dict) or tag.get("name") in tags]
+
+    if isinstance(components, dict):
+        reachable = reachable_components([*path_items, {"security": pruned.get("security")}], components)
+        pruned["components"] = {
+            section: (
+                {name: entry for name, entry in entries.items() if name in reachable.get(section, ())}
+                if isinstance(entries, dict) and not section.startswith("x-")
+                else entries
+            )
+            for section, entries in components.items()
+        }
+    return pruned
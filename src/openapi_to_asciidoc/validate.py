@@ -0,0 +1,224 @@
+# Copyright © LFV
+"""Validation of specifications without converting them.
+
+A specification is validated the same way it's loaded, with its marshmallow schemas, but nothing is rendered and the
+ loaded objects are dropped. The path items, webhooks and entries of the components maps are validated one at a
+ time, in shards spread over worker processes, and the errors of all of the specification are reported, each with
+ the JSON pointer of where it is in the specification.
+"""
+
+from itertools import islice
+from typing import List
+
+from marshmallow import Schema, ValidationError, fields
+from marshmallow.exceptions import SCHEMA
+
+from openapi_to_asciidoc import decoding
+from openapi_to_asciidoc.ingest import COMPONENTS_SCHEMAS
+from openapi_to_asciidoc.objects import OpenApiSchema, PathItemObjectSchema, PathsItemObjectSchema
+
+# Smallest number of entries validated by a worker at a time, smaller shards cost more to send than to validate.
+MIN_SHARD_SIZE = 50
+
+# Fields that the schemas load under another name than the one in the specification.
+RENAMED = {"schema_object": "schema"}
+
+# Schemas of the entries that are validated one at a time, by the map they are in.
+ENTRY_SCHEMAS = dict(COMPONENTS_SCHEMAS, paths=PathItemObjectSchema, webhooks=PathItemObjectSchema)
+
+# Creating a schema takes far longer than validating a small object with it, so each process creates them once.
+_schemas = {}
+
+
+def pointer(location: tuple) -> str:
+    """Returns the JSON pointer of a location in the specification, "" for the specification itself."""
+    return "".join("/" + str(key).replace("~", "~0").replace("/", "~1") for key in location)
+
+
+def error_list(messages, schema: Schema, location: tuple = ()) -> List[dict]:
+    """
+    Returns the errors in the messages of a ValidationError raised by a schema.
+
+    Parameters:
+    - messages: The messages, nested like the fields of the schema.
+    - schema (Schema): The schema that raised the error.
+    - location (tuple): Where the object that the schema validated is in the specification.
+
+    Returns:
+    - list: Each error as a dict with the JSON pointer of where it is and its message.
+    """
+    if not isinstance(messages, dict):
+        return leaf_errors(messages, location)
+
+    fields_by_key = {field.data_key or name: field for name, field in schema.fields.items()}
+    errors = []
+    for key, value in messages.items():
+        if key == SCHEMA:
+            errors += leaf_errors(value, location)
+        elif isinstance(schema, PathsItemObjectSchema) and key == "paths":
+            errors += field_errors(value, fields_by_key[key], location)  # the paths object is loaded as this field
+        else:
+            errors += field_errors(value, fields_by_key.get(key), location + (RENAMED.get(key, key),))
+    return errors
+
+
+def field_errors(messages, field: fields.Field, location: tuple) -> List[dict]:
+    if not isinstance(messages, dict):
+        return leaf_errors(messages, location)
+
+    errors = []
+    if isinstance(field, fields.Nested) and not field.many:
+        errors += error_list(messages, field.schema, location)
+    elif isinstance(field, fields.Nested):
+        for index, value in messages.items():
+            errors += error_list(value, field.schema, location + (index,))
+    elif isinstance(field, fields.List):
+        for index, value in messages.items():
+            errors += field_errors(value, field.inner, location + (index,))
+    elif isinstance(field, fields.Dict):
+        # the messages of each entry are split into the ones of its key and of its value
+        for key, value in messages.items():
+            errors += leaf_errors(value.get("key", []), location + (key,))
+            errors += field_errors(value.get("value", []), field.value_field, location + (key,))
+    else:
+        # a field that its schema remaps before loading it
+        for key, value in messages.items():
+            errors += field_errors(value, None, location + (key,))
+    return errors
+
+
+def leaf_errors(messages, location: tuple) -> List[dict]:
+    if isinstance(messages, str):
+        messages = [messages]
+
+    errors = []
+    for message in messages:
+        if isinstance(message, str):
+            errors.append({"pointer": pointer(location), "message": message})
+        else:
+            errors += field_errors(message, None, location)
+    return errors
+
+
+def schema_errors(schema: Schema, data, location: tuple) -> List[dict]:
+    """Returns the errors of validating the data with the schema, [] if it's valid."""
+    try:
+        schema.load(data)
+    except ValidationError as error:
+        return error_list(error.messages, schema, location)
+    return []
+
+
+def validate_entries(shard: tuple) -> List[dict]:
+    """Returns the errors of the entries of a map, each validated with the schema of the map's entries."""
+    location, entries = shard
+    name = location[-1]
+    if name not in _schemas:
+        _schemas[name] = ENTRY_SCHEMAS[name]()
+
+    errors = []
+    for key, value in entries.items():
+        errors += schema_errors(_schemas[name], value, location + (key,))
+    return errors
+
+
+def split_maps(data: dict) -> tuple:
+    """
+    Take the maps of path items, webhooks and components out of a document, to validate their entries one at a time.
+
+    Returns:
+    - dict: The rest of the document, to validate as a whole.
+    - dict: Each map by its location.
+    """
+    rest = dict(data)
+    maps = {}
+    if isinstance(data.get("paths"), dict):
+        paths = rest.pop("paths")
+        maps[("paths",)] = {key: value for key, value in paths.items() if not key.startswith("x-")}
+        rest["paths"] = {key: value for key, value in paths.items() if key.startswith("x-")}
+    if isinstance(data.get("webhooks"), dict):
+        maps[("webhooks",)] = rest.pop("webhooks")
+    if isinstance(data.get("components"), dict):
+        components = rest.pop("components")
+        names = [name for name in COMPONENTS_SCHEMAS if isinstance(components.get(name), dict)]
+        maps.update((("components", name), components[name]) for name in names)
+        rest["components"] = {key: value for key, value in components.items() if key not in names}
+    return rest, maps
+
+
+def shards(maps: dict, jobs: int) -> list:
+    """Returns the entries of the maps in shards, each with the location of its map, about jobs * 4 of them."""
+    size = max(MIN_SHARD_SIZE, -(-sum(len(entries) for entries in maps.values()) // (jobs * 4)))
+    split = []
+    for location, entries in maps.items():
+        iterator = iter(entries.items())
+        while shard := dict(islice(iterator, size)):
+            split.append((location, shard))
+    return split
+
+
+def validate(data, jobs: int = 1) -> List[dict]:
+    """
+    Validate a decoded specification.
+
+    Parameters:
+    - data: The decoded specification. It's changed while it's validated, like OpenApiSchema().load() changes it.
+    - jobs (int): Number of worker processes that validate the path items, webhooks and components.
+
+    Returns:
+    - list: The errors of all of the specification, [] if it's valid. The errors of the top level fields come first.
+    """
+    if not isinstance(data, dict):
+        return schema_errors(OpenApiSchema(), data, ())
+
+    rest, maps = split_maps(data)
+    errors = schema_errors(OpenApiSchema(), rest, ())
+    # the paths object itself, its path items are validated below
+    paths = maps.get(("paths",), {})
+    errors += [{"pointer": pointer(("paths", key)), "message": "Invalid value."} for key in paths if key[:1] != "/"]
+
+    if jobs > 1 and sum(len(entries) for entries in maps.values()) > MIN_SHARD_SIZE:
+        from openapi_to_asciidoc import parallel
+
+        with parallel.executor(jobs) as pool:
+            results = list(pool.map(validate_entries, shards(maps, jobs)))
+    else:
+        results = [validate_entries(shard) for shard in maps.items()]
+
+    for result in results:
+        errors += result
+    return errors
+
+
+def validate_file(path: str, jobs: int = 1) -> dict:
+    """
+    Validate a specification file, - for stdin.
+
+    Returns:
+    - dict: The report of the file, with its errors, including one for a file that can't be read or decoded.
+    """
+    try:
+        errors = validate(decoding.load(path), jobs=jobs)
+    except (OSError, ValueError) as error:
+        errors = [{"pointer": "", "message": f"{type(error).__name__}: {error}"}]
+    return {"file": path, "valid": not errors, "errors": errors}
+
+
+def validate_files(paths: List[str], jobs: int = 1) -> dict:
+    """
+    Validate several specification files, in a pool of worker processes if jobs > 1.
+
+    A single file is validated in shards by the workers instead.
+
+    Returns:
+    - dict: The report of all the files, valid if all of them are, and the report of each.
+    """
+    if jobs > 1 and len(paths) > 1:
+        from openapi_to_asciidoc import parallel
+
+        with parallel.executor(min(jobs, len(paths))) as pool:
+            reports = list(pool.map(validate_file, paths))
+    else:
+        reports = [validate_file(path, jobs=jobs) for path in paths]
+
+    return {"valid": all(report["valid"] for report in reports), "specifications": reports}
@@ -0,0 +1,114 @@
+# Copyright © LFV
+"""Watch mode, that converts a specification again every time it changes.
+
+The process stays running with its templates compiled, and the rendered path items, webhooks and components are
+ kept between conversions, so that only the entries that changed are loaded and rendered again. Changes are found
+ by polling the modification time of the file, which works the same on every platform.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, TextIO, Union
+
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import cache, decoding
+
+
+def file_state(path: str) -> tuple:
+    """Returns what identifies the current version of the file, None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def write_output(path: str, text: str):
+    """Replace the file with text at once, so that a viewer of the file never sees a partly written version."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with open(fd, "w") as f:
+            f.write(text)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def convert(
+    input_path: str,
+    output_path: str,
+    fragments: Union[cache.DiskCache, cache.MemoryCache],
+    load: Callable,
+    jobs: int = 1,
+    log: TextIO = sys.stderr,
+) -> bool:
+    """
+    Convert the specification once, reusing the fragments of the entries that didn't change.
+
+    Returns:
+    - bool: True if the output was written, False if the specification couldn't be loaded or rendered, which is
+     reported on log.
+    """
+    hits, misses = fragments.hits, fragments.misses
+    try:
+        changed_at = os.stat(input_path).st_mtime
+        data = decoding.load(input_path)
+        openapi = cache.load_openapi(data, fragments, load=load, jobs=jobs)
+        write_output(output_path, openapi.result)
+    except (OSError, ValueError, ValidationError) as error:  # e.g. a file that is replaced while it's read
+        messages = error.messages if isinstance(error, ValidationError) else error
+        print(f"Can't convert {input_path}: {messages}", file=log, flush=True)
+        return False
+    except Exception as error:  # e.g. a value a template can't render, which the next change may fix
+        print(f"Can't convert {input_path}: {type(error).__name__}: {error}", file=log, flush=True)
+        return False
+
+    fragments.evict()
+
+    latency = max(0.0, time.time() - changed_at)
+    rendered, reused = fragments.misses - misses, fragments.hits - hits
+    print(
+        f"Wrote {output_path} {latency * 1000:.0f} ms after the change ({rendered} rendered, {reused} reused)",
+        file=log,
+        flush=True,
+    )
+    return True
+
+
+def watch(
+    input_path: str,
+    output_path: str,
+    fragments: Union[cache.DiskCache, cache.MemoryCache],
+    load: Callable,
+    interval: float = 0.5,
+    jobs: int = 1,
+    log: TextIO = sys.stderr,
+):
+    """
+    Convert the specification, then again every time it changes, until interrupted.
+
+    Parameters:
+    - input_path (str): The specification file.
+    - output_path (str): Where the result is written.
+    - fragments (DiskCache or MemoryCache): Where the rendered entries are kept between conversions.
+    - load (Callable): Loads the entries that changed, like OpenApiSchema().load().
+    - interval (float): Seconds between each check of the specification for changes.
+    - jobs (int): Number of processes to render the entries that changed with.
+    """
+    print(f"Watching {input_path}, press Ctrl+C to stop", file=log, flush=True)
+    converted_state = None
+    try:
+        while True:
+            state = file_state(input_path)
+            if state is not None and state != converted_state:
+                converted_state = state
+                convert(input_path, output_path, fragments, load=load, jobs=jobs, log=log)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,44 @@
+# Copyright © LFV
+"""Parse time of a specification with each installed JSON backend, read into memory and memory mapped.
+
+Run from the repository root, with a specification or a generated one with the given number of paths:
+
+    python tests/benchmark/bench_decode.py [openapi.json | number of paths]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src")))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openapi_to_asciidoc import decoding  # noqa: E402
+from generate import generate_spec  # noqa: E402
+
+REPEAT = 5
+PATHS = 5000
+
+
+def main():
+    argument = sys.argv[1] if len(sys.argv) > 1 else str(PATHS)
+    with tempfile.TemporaryDirectory() as directory:
+        if argument.isdigit():
+            path = os.path.join(directory, "openapi.json")
+            with open(path, "w") as f:
+                json.dump(generate_spec(paths=int(argument)), f)
+        else:
+            path = argument
+
+        print(f"{path}: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        for backend in decoding.available_backends():
+            decoding.configure(backend)
+            for use_mmap in (False, True):
+                best = min(timeit.repeat(lambda: decoding.load(path, use_mmap=use_mmap), number=1, repeat=REPEAT))
+                print(f"{backend + (' (mmap)' if use_mmap else ''):<20} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Copyright © LFV
+"""Time of each phase of a conversion, for generated specifications of several sizes.
+
+The phases are decoding the JSON, loading it with OpenApiSchema().load(), rendering the templates and
+ format_output(). Each phase is timed separately and the best of --repeat runs is kept. Run from the
+ repository root, store the results of a known good version as the baseline, and compare later runs with it:
+
+    python tests/benchmark/bench_phases.py --output baseline.json
+    python tests/benchmark/bench_phases.py --baseline baseline.json --tolerance 0.2
+
+The exit code is 1 if a phase got slower than the baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src")))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openapi_to_asciidoc import render  # noqa: E402
+from openapi_to_asciidoc.objects import OpenApiSchema  # noqa: E402
+from generate import generate_spec  # noqa: E402
+
+SCALES = {
+    "small": dict(paths=50, operations=2, components=25, ref_fanout=2, nesting=1, example_size=100),
+    "medium": dict(paths=250, operations=3, components=100, ref_fanout=3, nesting=2, example_size=500),
+    "large": dict(paths=1000, operations=4, components=400, ref_fanout=4, nesting=2, example_size=2000),
+}
+
+# Phases that are faster than this in the baseline aren't compared, their timings are mostly noise.
+MIN_BASELINE_SECONDS = 0.005
+
+
+def time_phases(text: bytes) -> dict:
+    """Convert the specification once and return the seconds each phase took."""
+    timings = {}
+
+    start = time.perf_counter()
+    data = json.loads(text)
+    timings["json.load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    openapi = OpenApiSchema().load(data)
+    timings["OpenApiSchema.load"] = time.perf_counter() - start
+
+    template = render.get_environment().get_template("openapi_obj.j2")
+    start = time.perf_counter()
+    output = template.render(obj=openapi)
+    timings["render"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    render.format_output(output)
+    timings["format_output"] = time.perf_counter() - start
+
+    return timings
+
+
+def run(scales: list, repeat: int) -> dict:
+    render.configure()
+    time_phases(json.dumps(generate_spec(paths=1, components=1)).encode("utf-8"))  # compile the templates
+    results = {"python": platform.python_version(), "machine": platform.machine(), "scales": {}}
+    for scale in scales:
+        text = json.dumps(generate_spec(**SCALES[scale])).encode("utf-8")
+        runs = [time_phases(text) for _ in range(repeat)]
+        phases = {phase: min(timings[phase] for timings in runs) for phase in runs[0]}
+        results["scales"][scale] = {"spec": SCALES[scale], "bytes": len(text), "phases": phases}
+        print(f"{scale} ({len(text) / 1024 / 1024:.1f} MB)")
+        for phase, seconds in phases.items():
+            print(f"  {phase:<20} {seconds * 1000:10.2f} ms")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare the results with a baseline.
+
+    Returns:
+    - list: A message for each phase that is slower than in the baseline by more than tolerance, a fraction.
+    """
+    regressions = []
+    for scale, result in results["scales"].items():
+        expected = baseline.get("scales", {}).get(scale)
+        if expected is None or expected["spec"] != result["spec"]:
+            print(f"{scale}: not in the baseline, or generated with other options", file=sys.stderr)
+            continue
+
+        for phase, seconds in result["phases"].items():
+            before = expected["phases"].get(phase)
+            if before is None or before < MIN_BASELINE_SECONDS:
+                continue
+            if seconds > before * (1 + tolerance):
+                regressions.append(f"{scale} {phase}: {seconds * 1000:.2f} ms, baseline {before * 1000:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each scale, the fastest is kept")
+    parser.add_argument("--output", help="File to write the results to as JSON")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown (default: 0.2, 20 %%)")
+    args = parser.parse_args()
+
+    results = run(args.scales, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Slower than the baseline: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# Copyright © LFV
+"""Cold vs warm render time of the shared template environment.
+
+Run from the repository root:
+
+    python tests/benchmark/bench_render.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src")))
+
+from openapi_to_asciidoc import render  # noqa: E402
+from openapi_to_asciidoc.objects import OpenApiSchema  # noqa: E402
+
+SPEC = os.path.join(os.path.dirname(__file__), "..", "resources", "test.json")
+REPEAT = 20
+
+
+def render_once(obj):
+    render.render_object(obj, "openapi_obj.j2")
+
+
+def cold(obj, template_cache_dir=None):
+    render.configure(template_cache_dir=template_cache_dir)
+    render_once(obj)
+
+
+def main():
+    with open(SPEC) as f:
+        obj = OpenApiSchema().load(json.load(f))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # fill the bytecode cache once
+        cold(obj, template_cache_dir=cache_dir)
+
+        results = {
+            "cold (compile from source)": lambda: cold(obj),
+            "cold (bytecode cache)": lambda: cold(obj, template_cache_dir=cache_dir),
+            "warm (shared environment)": lambda: render_once(obj),
+        }
+
+        render.configure()
+        render_once(obj)
+        for name, func in results.items():
+            best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+            print(f"{name:<30} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
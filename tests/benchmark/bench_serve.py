@@ -0,0 +1,105 @@
+# Copyright © LFV
+"""Latency and throughput of the conversion service, o2a serve, for generated specifications.
+
+Starts a service on a free localhost port, or uses the one at --url, and sends it --requests conversions from
+ --concurrency clients at a time. Each specification is sent --repeat times, so all but the first conversion of
+ each are answered from the result cache, unless the service runs without one. Run from the repository root:
+
+    python tests/benchmark/bench_serve.py --concurrency 8 --requests 200
+    python tests/benchmark/bench_serve.py --url http://127.0.0.1:8080 --repeat 1
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src")))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openapi_to_asciidoc import render, serve  # noqa: E402
+from generate import generate_spec  # noqa: E402
+
+
+def start_service(workers: int, queue_size: int, cache_size: int) -> str:
+    render.configure()
+    service = serve.ConversionService(workers=workers, queue_size=queue_size, cache_size=cache_size)
+    service.warm_up()
+    server = serve.create_server("127.0.0.1", 0, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def post(url: str, body: bytes) -> tuple:
+    """Convert a specification, returns the status and the seconds until the whole response was read."""
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port)
+    start = time.perf_counter()
+    try:
+        connection.request("POST", "/convert", body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - start
+    finally:
+        connection.close()
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run(url: str, bodies: list, concurrency: int) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(lambda body: post(url, body), bodies))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds for status, seconds in results if status == 200]
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        "requests": len(bodies),
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "statuses": statuses,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.5) * 1000 if latencies else None,
+            "p95": percentile(latencies, 0.95) * 1000 if latencies else None,
+            "max": max(latencies) * 1000 if latencies else None,
+            "mean": statistics.mean(latencies) * 1000 if latencies else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Service to benchmark (default: start one)")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests sent at a time")
+    parser.add_argument("--repeat", type=int, default=4, help="Times each specification is sent")
+    parser.add_argument("--paths", type=int, default=50, help="Paths of each generated specification")
+    parser.add_argument("--workers", type=int, default=4, help="Workers of the started service")
+    parser.add_argument("--queue-size", type=int, default=64, help="Queue size of the started service")
+    parser.add_argument("--cache-size", type=float, default=64, help="Result cache megabytes of the started service")
+    args = parser.parse_args()
+
+    url = args.url or start_service(args.workers, args.queue_size, int(args.cache_size * 1024 * 1024))
+    count = -(-args.requests // args.repeat)
+    specs = [json.dumps(generate_spec(paths=args.paths, seed=seed)).encode("utf-8") for seed in range(count)]
+
+    bodies = [specs[index % count] for index in range(args.requests)]  # repeats of a spec aren't sent at once
+    result = run(url, bodies, args.concurrency)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# Copyright © LFV
+"""Deterministic generator of synthetic OpenAPI specifications for the benchmarks.
+
+The same arguments always give the same specification, so that timings of different runs are comparable.
+ Run from the repository root to write a specification:
+
+    python tests/benchmark/generate.py --paths 1000 --components 500 > openapi.json
+"""
+
+import argparse
+import json
+import random
+import sys
+
+METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+TYPES = ("string", "integer", "number", "boolean")
+
+
+def payload(rand: random.Random, size: int) -> dict:
+    """Returns an example payload of about size bytes of JSON."""
+    example = {}
+    while len(json.dumps(example)) < size:
+        example[f"field{len(example)}"] = rand.choice([rand.randint(0, 10**6), f"value {rand.random():.6f}", True])
+    return example
+
+
+def schema(rand: random.Random, components: int, depth: int, properties: int = 4) -> dict:
+    """Returns an object schema, with allOf and oneOf combinations nested depth levels deep."""
+    result = {
+        "type": "object",
+        "description": f"Generated schema {rand.randint(0, 10**6)}",
+        "required": ["id"],
+        "properties": {"id": {"type": "integer", "format": "int64"}},
+    }
+    for i in range(properties):
+        result["properties"][f"property{i}"] = {"type": rand.choice(TYPES), "description": f"Property {i}"}
+    if components:
+        result["properties"]["related"] = {"$ref": f"#/components/schemas/Schema{rand.randrange(components)}"}
+    if depth > 0:
+        result["allOf"] = [schema(rand, components, depth - 1, properties=2)]
+        result["oneOf"] = [schema(rand, components, depth - 1, properties=1) for _ in range(2)]
+    return result
+
+
+def operation(rand: random.Random, path_index: int, method: str, options: dict) -> dict:
+    components = options["components"]
+    references = [
+        {"$ref": f"#/components/schemas/Schema{rand.randrange(components)}"}
+        for _ in range(options["ref_fanout"] if components else 0)
+    ]
+    content_schema = {"oneOf": references} if references else schema(rand, 0, options["nesting"])
+    media_type = {"schema": content_schema}
+    if options["example_size"]:
+        media_type["example"] = payload(rand, options["example_size"])
+
+    return {
+        "tags": [f"tag{path_index % 10}"],
+        "summary": f"{method.upper()} resource {path_index}",
+        "operationId": f"{method}Resource{path_index}",
+        "parameters": [
+            {"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}},
+            {"name": "filter", "in": "query", "description": "Filters the result", "schema": {"type": "string"}},
+        ],
+        "responses": {
+            "200": {"description": "The resource", "content": {"application/json": media_type}},
+            "404": {"description": "Not found"},
+        },
+    }
+
+
+def generate_spec(
+    paths: int = 100,
+    operations: int = 2,
+    components: int = 50,
+    ref_fanout: int = 2,
+    nesting: int = 2,
+    example_size: int = 200,
+    seed: int = 0,
+) -> dict:
+    """
+    Generate a specification.
+
+    Parameters:
+    - paths (int): Number of paths.
+    - operations (int): Number of operations of each path, at most 8.
+    - components (int): Number of schemas in the components.
+    - ref_fanout (int): Number of component schemas each operation's response refers to with $ref.
+    - nesting (int): How deep allOf and oneOf combinations are nested in each schema.
+    - example_size (int): Bytes of JSON of each response example, 0 for none.
+    - seed (int): Seed of the random choices, the same seed gives the same specification.
+
+    Returns:
+    - dict: The specification.
+    """
+    rand = random.Random(seed)
+    options = {"components": components, "ref_fanout": ref_fanout, "nesting": nesting, "example_size": example_size}
+    return {
+        "openapi": "3.1.0",
+        "info": {"title": "Synthetic API", "version": "1.0.0", "description": "Generated for benchmarks"},
+        "servers": [{"url": "https://api.example.com/v1"}],
+        "paths": {
+            f"/resources{i}/{{id}}": {method: operation(rand, i, method, options) for method in METHODS[:operations]}
+            for i in range(paths)
+        },
+        "components": {"schemas": {f"Schema{i}": schema(rand, components, nesting) for i in range(components)}},
+        "tags": [{"name": f"tag{i}", "description": f"Tag {i}"} for i in range(10)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=100)
+    parser.add_argument("--operations", type=int, default=2)
+    parser.add_argument("--components", type=int, default=50)
+    parser.add_argument("--ref-fanout", type=int, default=2)
+    parser.add_argument("--nesting", type=int, default=2)
+    parser.add_argument("--example-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    json.dump(generate_spec(**vars(parser.parse_args())), sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# Copyright © LFV
+
+import json
+
+from benchmark.generate import generate_spec
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+
+def test_generate_spec():
+    options = dict(paths=5, operations=3, components=4, ref_fanout=2, nesting=2, example_size=300)
+    spec = generate_spec(**options)
+
+    assert json.dumps(spec) == json.dumps(generate_spec(**options))
+    assert json.dumps(spec) != json.dumps(generate_spec(**options, seed=1))
+    assert len(spec["paths"]) == 5
+    assert all(len(path_item) == 3 for path_item in spec["paths"].values())
+    assert len(spec["components"]["schemas"]) == 4
+    assert "Schema" in OpenApiSchema().load(spec).result
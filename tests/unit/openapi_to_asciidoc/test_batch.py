@@ -0,0 +1,81 @@
+# Copyright © LFV
+
+import io
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from openapi_to_asciidoc import batch, render, resolve
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+
+def test_expand_inputs(tmp_path):
+    for name in ("b.json", "a.json", "c.txt"):
+        (tmp_path / name).write_text("{}")
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text(f"# specifications\n\n{tmp_path / '*.json'}\n{tmp_path / 'missing.json'}\n")
+
+    inputs = batch.expand_inputs(batch.read_manifest(manifest) + [str(tmp_path / "a.json")])
+
+    assert inputs == [str(tmp_path / "a.json"), str(tmp_path / "b.json"), str(tmp_path / "missing.json")]
+
+
+def test_output_paths():
+    assert batch.output_paths(["specs/a.json", "b.json"], "out") == [Path("out/a.adoc"), Path("out/b.adoc")]
+    with pytest.raises(ValueError):
+        batch.output_paths(["one/a.json", "two/a.json"], "out")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_convert_files(tmp_path, jobs):
+    shutil.copy("tests/resources/test.json", tmp_path / "good.json")
+    (tmp_path / "bad.json").write_text('{"openapi": 3}')
+    log = io.StringIO()
+
+    inputs = [str(tmp_path / "good.json"), str(tmp_path / "bad.json"), str(tmp_path / "missing.json")]
+    failed = batch.convert_files(inputs, tmp_path / "out", jobs=jobs, log=log)
+
+    with open("tests/resources/test.json") as json_file:
+        expected = OpenApiSchema().load(json.load(json_file)).result
+    assert failed == 2
+    assert (tmp_path / "out" / "good.adoc").read_text() == expected
+    assert not (tmp_path / "out" / "bad.adoc").exists()
+    assert log.getvalue().splitlines()[-1] == "1 converted, 2 failed"
+
+
+def test_convert_file_stream(tmp_path):
+    assert batch.convert_file("tests/resources/test.json", tmp_path / "out" / "test.adoc", stream=True) is None
+
+    with open("tests/resources/test.json") as json_file:
+        assert (tmp_path / "out" / "test.adoc").read_text() == OpenApiSchema().load(json.load(json_file)).result
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_convert_files_resolved_references(tmp_path, use_mmap):
+    expected = {}
+    for pet_type in ("object", "string"):
+        content = {"application/json": {"schema": {"$ref": "#/components/schemas/Pet"}}}
+        responses = {"200": {"description": "A pet", "content": content}}
+        spec = {
+            "openapi": "3.1.0",
+            "paths": {"/pets": {"get": {"responses": responses}}},
+            "components": {"schemas": {"Pet": {"type": pet_type}}},
+        }
+        (tmp_path / f"{pet_type}.json").write_text(json.dumps(spec))
+        open_api = OpenApiSchema().load(spec)
+        resolve.resolve_references(open_api)
+        expected[pet_type] = open_api.result
+
+    # the same reference is resolved to another schema in each specification, while fragments are shared by them
+    render.configure(fragment_cache_size=1000)
+    try:
+        inputs = [str(tmp_path / "object.json"), str(tmp_path / "string.json")]
+        options = {"resolve_refs": True, "use_mmap": use_mmap}
+        assert batch.convert_files(inputs, tmp_path / "out", jobs=1, log=io.StringIO(), **options) == 0
+    finally:
+        render.configure()
+
+    for pet_type, result in expected.items():
+        assert (tmp_path / "out" / f"{pet_type}.adoc").read_text() == result
@@ -0,0 +1,96 @@
+# Copyright © LFV
+
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from openapi_to_asciidoc import budget, cache, convert, ingest, render
+from openapi_to_asciidoc.objects import SchemaObjectSchema
+
+
+def nested(depth: int) -> dict:
+    schema = {"type": "string"}
+    for level in range(depth):
+        schema = {"type": "object", "properties": {f"p{level}": schema}}
+    return schema
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    render.configure()
+    yield
+    budget.configure()
+    budget.name_components(SimpleNamespace(components=None))
+
+
+def test_depth_limit(caplog):
+    schemas = {"Deep": SchemaObjectSchema().load(nested(4))}
+    full = render.render_fragment(schemas["Deep"], "schema_obj.j2")
+
+    budget.configure(max_depth=2)
+    budget.name_components(SimpleNamespace(components=SimpleNamespace(schemas=schemas)))
+    with caplog.at_level(logging.WARNING):
+        text = render.render_fragment(schemas["Deep"], "schema_obj.j2")
+
+    assert "*p2*" in text and "*p1*" in text and "*p0*" not in text and "*p0*" in full
+    assert "_Not expanded_" in text and "<<_components_schemas_Deep" not in text
+    assert caplog.messages == [
+        "Schema #/components/schemas/Deep reached its expansion limit (depth 2), nested schemas not expanded: 1."
+    ]
+
+    budget.configure(max_depth=4)
+    assert render.render_fragment(schemas["Deep"], "schema_obj.j2") == full
+
+
+def test_node_limit(caplog):
+    schema = SchemaObjectSchema().load(
+        {
+            "title": "Wide",
+            "properties": {f"p{index}": {"type": "integer"} for index in range(5)},
+            "items": {"$ref": "#/components/schemas/Item"},
+        }
+    )
+    budget.configure(max_nodes=3)
+    render.configure(fragment_cache_size=100)
+
+    with caplog.at_level(logging.WARNING):
+        text = render.render_fragment(schema, "schema_obj.j2")
+        assert render.render_fragment(schema, "schema_obj.j2") == text
+
+    # items comes first in schema_obj.j2, the first property is the third schema of the expansion
+    assert "ref: <<_components_schemas_Item, #/components/schemas/Item>>" in text
+    assert text.count("type: integer") == 1 and text.count("_Not expanded_") == 4
+    message = "Schema schema 'Wide' reached its expansion limit (nodes 3), nested schemas not expanded: 4."
+    assert caplog.messages == [message]
+
+
+def test_same_output_when_cached_or_streamed(tmp_path, caplog):
+    response = {"description": "Deep", "content": {"application/json": {"schema": nested(4)}}}
+    spec = {
+        "openapi": "3.1.0",
+        "info": {"title": "Deep", "version": "1.0"},
+        "paths": {"/deep": {"get": {"responses": {"200": response}}}},
+        "components": {"schemas": {"Deep": nested(4)}},
+    }
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(spec))
+    budget.configure(max_depth=2)
+
+    outputs = []
+    with caplog.at_level(logging.WARNING):
+        outputs.append(convert.prepare_schema(json.loads(path.read_text()), convert.load_schema).result)
+        for _ in range(2):  # rendered and stored in the disk cache, then taken from it
+            disk_cache = cache.DiskCache(tmp_path / "cache")
+            schema = convert.prepare_schema(json.loads(path.read_text()), convert.load_schema, disk_cache=disk_cache)
+            outputs.append(schema.result)
+        with open(path, "rb") as f, ingest.load(f) as schema:
+            budget.name_components(schema)
+            outputs.append(schema.result)
+
+    assert "_Not expanded_" in outputs[0] and outputs == [outputs[0]] * 4
+    message = "Schema {} reached its expansion limit (depth 2), nested schemas not expanded: 1."
+    expected = [message.format("object schema"), message.format("#/components/schemas/Deep")]
+    # the second conversion with the disk cache takes the rendered schemas from it, so they aren't reported again
+    assert sorted(caplog.messages) == sorted(expected * 3)
@@ -0,0 +1,97 @@
+# Copyright © LFV
+
+import json
+import os
+import time
+
+import pytest
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import cache, profiling
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+
+def load_test_spec() -> dict:
+    with open("tests/resources/test.json") as json_file:
+        return json.load(json_file)
+
+
+def load(data: dict):
+    return OpenApiSchema().load(data)
+
+
+def test_reuse_cached_entries(tmp_path):
+    expected = load(load_test_spec()).result
+
+    first = cache.DiskCache(tmp_path)
+    assert cache.load_openapi(load_test_spec(), first, load=load).result == expected
+    assert first.hits == 0 and first.misses > 0
+
+    second = cache.DiskCache(tmp_path)
+    assert cache.load_openapi(load_test_spec(), second, load=load).result == expected
+    assert (second.hits, second.misses) == (first.misses, 0)
+
+
+def test_render_changed_entries(tmp_path):
+    cache.load_openapi(load_test_spec(), cache.DiskCache(tmp_path), load=load)
+
+    data = load_test_spec()
+    data["paths"]["/pets"]["get"]["summary"] = "Changed"
+    data["components"]["schemas"]["Added"] = {"type": "string"}
+    expected = load(json.loads(json.dumps(data))).result
+
+    disk_cache = cache.DiskCache(tmp_path)
+    assert cache.load_openapi(data, disk_cache, load=load).result == expected
+    assert disk_cache.misses == 2
+
+
+def test_invalid_entry(tmp_path):
+    cache.load_openapi(load_test_spec(), cache.DiskCache(tmp_path), load=load)
+
+    data = load_test_spec()
+    data["paths"]["/pets"]["get"]["deprecated"] = "sometimes"
+
+    with pytest.raises(ValidationError) as expected:
+        load(json.loads(json.dumps(data)))
+    with pytest.raises(ValidationError) as error:
+        cache.load_openapi(data, cache.DiskCache(tmp_path), load=load)
+    assert error.value.messages == expected.value.messages
+
+
+def test_evict(tmp_path):
+    disk_cache = cache.DiskCache(tmp_path, max_age=60, max_size=10)
+    for key, age in (("aa01", 120), ("bb02", 30), ("cc03", 20), ("dd04", 10)):
+        disk_cache.put(key, "12345")
+        os.utime(disk_cache.path(key), (time.time() - age, time.time() - age))
+
+    disk_cache.evict()
+
+    assert [disk_cache.get(key) is not None for key in ("aa01", "bb02", "cc03", "dd04")] == [False, False, True, True]
+
+
+def test_accepts_the_same_documents(tmp_path):
+    data = load_test_spec()
+    cache.load_openapi(load_test_spec(), cache.DiskCache(tmp_path), load=load)
+
+    # the path items before it are cached, the changed one is loaded as the first entry of its map
+    data["paths"]["/pets"]["bogus"] = 1
+    expected = load(json.loads(json.dumps(data))).result
+    assert cache.load_openapi(data, cache.DiskCache(tmp_path), load=load).result == expected
+
+    data["components"]["bogus"] = 2
+    with pytest.raises(ValidationError) as expected:
+        load(json.loads(json.dumps(data)))
+    with pytest.raises(ValidationError) as error:
+        cache.load_openapi(data, cache.DiskCache(tmp_path), load=load)
+    assert error.value.messages == expected.value.messages
+
+
+def test_profiling_phases(tmp_path):
+    profiler = profiling.enable()
+    try:
+        cache.load_openapi(load_test_spec(), cache.DiskCache(tmp_path), load=load)
+    finally:
+        profiling.disable()
+
+    # the entries that aren't cached are rendered while loading, but measured as rendering
+    assert set(profiler.phases) == {"load", "render"}
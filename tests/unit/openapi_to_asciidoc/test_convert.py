@@ -2,9 +2,15 @@
 
 import pytest
 import json
+import subprocess
+import sys
 
+from openapi_to_asciidoc import convert
 from openapi_to_asciidoc.objects import OpenApi, OpenApiSchema
 
+# Modules that only a conversion needs, which --help and --version must not import.
+HEAVY_MODULES = ("marshmallow", "jinja2", "importlib.metadata", "multiprocessing", "openapi_to_asciidoc.objects")
+
 
 @pytest.mark.skip("Convert is not a class and we don't have things setup for testing it yet")
 def test_convert():
@@ -23,3 +29,15 @@ def test_parse():
     open_api: OpenApi = openapi_schema.load(data)
 
     assert open_api.result is not None
+
+
+@pytest.mark.parametrize("option", ["--help", "--version"])
+def test_startup_imports(option):
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", convert.__file__, option], capture_output=True, text=True, check=True
+    )
+
+    imported = {line.split("|")[-1].strip() for line in process.stderr.splitlines() if line.startswith("import time:")}
+    assert process.stdout
+    heavy = [module for module in imported if module.startswith(tuple(f"{name}." for name in HEAVY_MODULES))]
+    assert not heavy + [module for module in imported if module in HEAVY_MODULES]
@@ -0,0 +1,43 @@
+# Copyright © LFV
+
+import json
+
+import pytest
+
+from openapi_to_asciidoc import decoding
+
+
+@pytest.fixture(autouse=True)
+def reset_backend():
+    yield
+    decoding.configure()
+
+
+@pytest.mark.parametrize("backend", decoding.available_backends())
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_load_same_as_json(tmp_path, backend, use_mmap):
+    spec = tmp_path / "openapi.json"
+    spec.write_text('{"a": [1, 2.5, NaN, 123456789012345678901234567890], "b": "\\u00e5\\ud83d\\ude00", "c": null}')
+    decoding.configure(backend)
+
+    assert json.dumps(decoding.load(spec, use_mmap=use_mmap)) == json.dumps(json.loads(spec.read_text()))
+
+
+@pytest.mark.parametrize("backend", decoding.available_backends())
+def test_loads_same_error_as_json(backend):
+    decoding.configure(backend)
+    with pytest.raises(json.JSONDecodeError) as error:
+        decoding.loads(b'{"a": [1, }')
+
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(b'{"a": [1, }')
+    assert str(error.value) == str(expected.value)
+
+
+def test_configure():
+    decoding.configure("json")
+    assert decoding.backend() == "json"
+    assert decoding.configuration() == {"backend": "json"}
+
+    with pytest.raises(ValueError):
+        decoding.configure("yaml")
@@ -0,0 +1,42 @@
+# Copyright © LFV
+
+import json
+
+import pytest
+
+from openapi_to_asciidoc import examples
+
+VALUE = {"items": [{"id": index, "name": f"pet {index}"} for index in range(100)]}
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    yield
+    examples.configure()
+
+
+def test_small_values_are_rendered():
+    assert examples.render_large(VALUE) == ""
+    examples.configure(max_bytes=len(json.dumps(VALUE, indent=2)))
+    assert examples.render_large(VALUE) == ""
+
+
+def test_summary():
+    examples.configure(max_bytes=100)
+
+    text = examples.render_large(VALUE)
+
+    assert text.startswith("_Larger than 100 bytes, an object with 1 keys, starting with:_\n\n----\n{\n")
+    assert text.endswith(" ...\n----\n")
+    assert len(text) < 200
+
+
+def test_side_file(tmp_path):
+    examples.configure(max_bytes=100, directory=str(tmp_path / "examples"), include_directory="examples")
+
+    text = examples.render_large(VALUE)
+    assert examples.render_large(VALUE) == text
+
+    (path,) = (tmp_path / "examples").iterdir()
+    assert json.loads(path.read_text()) == VALUE
+    assert f"include::{{docdir}}/examples/{path.name}[]" in text
@@ -0,0 +1,56 @@
+# Copyright © LFV
+
+import copy
+import json
+
+import pytest
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import fastload
+from openapi_to_asciidoc.objects import OpenApiSchema, RenderableObject, object_fields
+
+
+def object_graph(value):
+    """Turns loaded objects into comparable values, with the type of every object and scalar included."""
+    if isinstance(value, RenderableObject):
+        attributes = {key: object_graph(item) for key, item in object_fields(value).items()}
+        return type(value).__name__, attributes
+    if isinstance(value, dict):
+        return {key: object_graph(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [object_graph(item) for item in value]
+    return type(value).__name__, value
+
+
+def load_test_spec() -> dict:
+    with open("tests/resources/test.json") as json_file:
+        return json.load(json_file)
+
+
+def variations() -> list:
+    spec = load_test_spec()
+    numbers = copy.deepcopy(spec)
+    numbers["components"]["schemas"]["Numbers"] = {"maximum": 10, "minLength": 2.0, "deprecated": "true"}
+    unknown = copy.deepcopy(spec)
+    unknown["paths"]["/pets"]["summary"] = "Not declared by PathItemObjectSchema"
+    return [spec, numbers, unknown]
+
+
+@pytest.mark.parametrize("data", variations())
+def test_same_objects_as_marshmallow(data):
+    expected = OpenApiSchema().load(copy.deepcopy(data))
+
+    assert object_graph(fastload.load(OpenApiSchema, data)) == object_graph(expected)
+
+
+def test_same_errors_as_marshmallow():
+    data = load_test_spec()
+    data["info"]["version"] = 1
+    data["components"]["schemas"]["Broken"] = {"type": ["string"], "properties": {"a": {"maxItems": "many"}}}
+
+    with pytest.raises(ValidationError) as expected:
+        OpenApiSchema().load(copy.deepcopy(data))
+    with pytest.raises(ValidationError) as error:
+        fastload.load(OpenApiSchema, data)
+
+    assert error.value.messages == expected.value.messages
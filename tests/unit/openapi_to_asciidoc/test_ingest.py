@@ -0,0 +1,64 @@
+# Copyright © LFV
+
+import io
+import json
+
+import pytest
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import ingest
+from openapi_to_asciidoc.objects import OpenApi, OpenApiSchema
+
+
+def test_scan_object():
+    buffer = b' { "a" : [1, {"b": "}]\\""}], "c\\u0041": "x", "d": -1.5e3, "e": {} } '
+
+    members = ingest.scan_object(buffer, 0)
+
+    assert list(members) == ["a", "cA", "d", "e"]
+    assert {key: json.loads(buffer[start:end]) for key, (start, end) in members.items()} == json.loads(buffer)
+
+
+def test_load_test_spec():
+    with open("tests/resources/test.json") as json_file:
+        expected = OpenApiSchema().load(json.load(json_file)).result
+
+    with open("tests/resources/test.json", "rb") as json_file:
+        with ingest.load(json_file) as open_api:
+            assert isinstance(open_api, OpenApi)
+            assert open_api.result == expected
+
+
+def test_invalid_path_entry():
+    spec = {"openapi": "3.1.0", "paths": {"/pets": {"get": {"deprecated": "maybe"}}}}
+
+    with ingest.load(io.BytesIO(json.dumps(spec).encode())) as open_api:
+        with pytest.raises(ValidationError) as error:
+            open_api.paths.paths["/pets"]
+
+    assert error.value.messages == {
+        "paths": {"paths": {"/pets": {"value": {"get": {"deprecated": ["Not a valid boolean."]}}}}}
+    }
+    with pytest.raises(ValidationError) as expected:
+        OpenApiSchema().load(spec)
+    assert error.value.messages == expected.value.messages
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"openapi": "3.1.0", "paths": {"pets": {}, "/pets": {}}},
+        {"openapi": "3.1.0", "paths": []},
+        {"openapi": "3.1.0", "components": {"schemas": {}, "foo": {}}},
+        {"openapi": "3.1.0", "components": {"schemas": []}},
+        {"openapi": "3.1.0", "components": {"responses": {"A": {"description": "A"}}}, "bogus": 1},
+    ],
+)
+def test_same_errors_as_schema(spec):
+    with pytest.raises(ValidationError) as expected:
+        OpenApiSchema().load(json.loads(json.dumps(spec)))
+
+    with pytest.raises(ValidationError) as error:
+        with ingest.load(io.BytesIO(json.dumps(spec).encode())):
+            pass
+    assert error.value.messages == expected.value.messages
@@ -0,0 +1,90 @@
+# Copyright © LFV
+
+import json
+
+import pytest
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import lazy
+from openapi_to_asciidoc.objects import OpenApiSchema, PathItemObject, object_fields
+
+
+def read_spec() -> dict:
+    with open("tests/resources/test.json") as json_file:
+        return json.load(json_file)
+
+
+def test_load_test_spec():
+    expected = OpenApiSchema().load(read_spec()).result
+
+    open_api = lazy.load(read_spec())
+    paths = open_api.paths.paths
+    assert isinstance(paths, lazy.LoadedEntries) and not paths.loaded
+
+    assert open_api.result == expected
+    assert set(paths.loaded) == set(paths)
+    assert paths["/pets"] is paths["/pets"]
+
+
+def test_lazy_operations():
+    path_item = lazy.load(read_spec()).paths.paths["/labs/3/users/{id}"]
+
+    assert isinstance(path_item, PathItemObject)
+    assert path_item._operations
+    assert path_item.get.operationId == "updatePetWithForm"
+    assert path_item.post is None
+    assert "get" not in path_item._operations
+    assert list(object_fields(path_item)) == list(PathItemObject.__slots__)
+
+
+def test_invalid_operation():
+    spec = {
+        "openapi": "3.1.0",
+        "paths": {"/pets": {"get": {"deprecated": "maybe"}}},
+        "components": {"schemas": {"Pet": {"type": "object"}, "Bad": {"required": "name"}}},
+    }
+
+    open_api = lazy.load(json.loads(json.dumps(spec)))
+    assert open_api.components.schemas["Pet"].type == "object"
+    with pytest.raises(ValidationError) as error:
+        open_api.paths.paths["/pets"].get
+    assert error.value.messages == {
+        "paths": {"paths": {"/pets": {"value": {"get": {"deprecated": ["Not a valid boolean."]}}}}}
+    }
+
+    # the same messages as when the whole document is loaded at once
+    with pytest.raises(ValidationError) as expected:
+        OpenApiSchema().load(json.loads(json.dumps(spec)))
+    with pytest.raises(ValidationError) as error:
+        lazy.load(json.loads(json.dumps(spec)), strict=True)
+    assert (
+        error.value.messages
+        == expected.value.messages
+        == {
+            "paths": {"paths": {"/pets": {"value": {"get": {"deprecated": ["Not a valid boolean."]}}}}},
+            "components": {"schemas": {"Bad": {"value": {"required": ["Not a valid list."]}}}},
+        }
+    )
+
+
+def test_unknown_fields():
+    spec = {
+        "openapi": "3.1.0",
+        "paths": {"/a": {"bogus": 1}, "/b": {"get": {"bogus": 2}, "put": {"bogus": 3}}},
+        "components": {"schemas": {"A": {"type": "object"}}, "responses": {"A": {"bogus": 4}, "B": {"bogus": 5}}},
+    }
+
+    expected = OpenApiSchema().load(json.loads(json.dumps(spec))).result
+
+    # accepted and rejected the same as when the document is loaded at once
+    for strict in (False, True):
+        open_api = lazy.load(json.loads(json.dumps(spec)), strict=strict)
+        assert open_api.paths.paths["/b"].put.responses is None
+        assert open_api.result == expected
+
+        for invalid in ({"components": {"bogus": 6}}, {"paths": {"pets": {}, "x-team": {}}}):
+            with pytest.raises(ValidationError) as eager:
+                OpenApiSchema().load(dict(json.loads(json.dumps(spec)), **invalid))
+            with pytest.raises(ValidationError) as error:
+                lazy.load(dict(json.loads(json.dumps(spec)), **invalid), strict=strict)
+            assert error.value.messages == eager.value.messages
@@ -0,0 +1,72 @@
+# Copyright © LFV
+
+import copy
+import tracemalloc
+
+import pytest
+from marshmallow import ValidationError
+
+from benchmark.generate import generate_spec
+from openapi_to_asciidoc.objects import OpenApiSchema, RenderableObject, SchemaObject, object_fields
+
+
+class DictObject:
+    """An object that stores its attributes in a __dict__, like the objects did before they had __slots__."""
+
+
+def copy_graph(value, with_slots: bool):
+    """Copy the objects of a loaded document, with slots or as DictObjects, sharing the scalar values."""
+    if isinstance(value, RenderableObject):
+        copy = type(value).__new__(type(value)) if with_slots else DictObject()
+        for name, item in object_fields(value).items():
+            setattr(copy, name, copy_graph(item, with_slots))
+        return copy
+    if isinstance(value, dict):
+        return {key: copy_graph(item, with_slots) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_graph(item, with_slots) for item in value]
+    return value
+
+
+def peak_memory(function, *args) -> int:
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_slots_memory():
+    openapi = OpenApiSchema().load(generate_spec(paths=40, operations=3, components=20, nesting=2))
+
+    with_slots = peak_memory(copy_graph, openapi, True)
+    with_dicts = peak_memory(copy_graph, openapi, False)
+
+    assert with_slots < 0.6 * with_dicts
+
+
+def test_object_fields():
+    schema = SchemaObject(type="string", description="A string")
+
+    assert not hasattr(schema, "__dict__")
+    assert not hasattr(schema, "resolved")
+    assert object_fields(schema)["type"] == "string"
+    assert object_fields(schema)["items"] is None
+    assert list(object_fields(schema)) == list(SchemaObject.__slots__)
+
+
+def test_unknown_fields():
+    schema = OpenApiSchema()
+    entries = {
+        "openapi": "3.1.0",
+        "paths": {"/a": {"get": {"bogus": 1}}, "/b": {"bogus": 2}},
+        "components": {"schemas": {"A": {"bogus": 3}, "B": {"bogus": 4}}},
+    }
+
+    # the same for each load of the same schema, not only for the first
+    for _ in range(2):
+        assert schema.load(copy.deepcopy(entries)).components.schemas["B"].title is None
+        with pytest.raises(ValidationError) as error:
+            schema.load({"openapi": "3.1.0", "info": {"title": "A", "version": "1", "bogus": 5}, "bogus": 6})
+        assert error.value.messages == {"info": {"bogus": ["Unknown field."]}, "bogus": ["Unknown field."]}
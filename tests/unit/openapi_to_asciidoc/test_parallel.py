@@ -0,0 +1,67 @@
+# Copyright © LFV
+
+import json
+
+import pytest
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import parallel, render
+from openapi_to_asciidoc.objects import OpenApi, OpenApiSchema
+
+
+def load_test_spec() -> OpenApi:
+    with open("tests/resources/test.json") as json_file:
+        return OpenApiSchema().load(json.load(json_file))
+
+
+def test_render_path_items():
+    expected = load_test_spec().result
+    open_api = load_test_spec()
+
+    parallel.render_path_items(open_api, jobs=2)
+
+    assert all(isinstance(path_item, render.RenderedFragment) for path_item in open_api.paths.paths.values())
+    assert all(isinstance(webhook, render.RenderedFragment) for webhook in open_api.webhooks.values())
+    assert open_api.result == expected
+
+
+def test_load_components():
+    with open("tests/resources/test.json") as json_file:
+        data = json.load(json_file)
+    data["components"]["schemas"].update({f"Generated{i}": {"type": "string"} for i in range(120)})
+    expected = OpenApiSchema().load(json.loads(json.dumps(data))).result
+
+    assert parallel.load_openapi(data, jobs=2).result == expected
+
+
+def test_load_components_errors():
+    components = {
+        "schemas": {f"Schema{i}": {"type": "string" if i % 60 else 1} for i in range(120)},
+        "parameters": {"limit": {"required": "sometimes"}},
+        "securitySchemes": [],
+    }
+    data = {"openapi": "3.1.0", "info": {}, "components": components}
+
+    with pytest.raises(ValidationError) as serial:
+        OpenApiSchema().load(json.loads(json.dumps(data)))
+    with pytest.raises(ValidationError) as sharded:
+        parallel.load_openapi(data, jobs=2)
+
+    assert sharded.value.messages == serial.value.messages
+
+
+@pytest.mark.parametrize("index", [0, parallel.MIN_SHARD_SIZE - 1, parallel.MIN_SHARD_SIZE])
+def test_load_components_unknown_fields(index):
+    schemas = {f"Schema{i}": {"type": "string"} for i in range(2 * parallel.MIN_SHARD_SIZE)}
+    schemas[f"Schema{index}"]["bogus"] = 1  # the first entry of the first or the second shard, or the last of one
+    data = {"openapi": "3.1.0", "info": {"title": "Shards", "version": "1.0"}, "components": {"schemas": schemas}}
+    expected = OpenApiSchema().load(json.loads(json.dumps(data))).result
+
+    assert parallel.load_openapi(json.loads(json.dumps(data)), jobs=2).result == expected
+
+    data["components"]["bogus"] = 2
+    with pytest.raises(ValidationError) as serial:
+        OpenApiSchema().load(json.loads(json.dumps(data)))
+    with pytest.raises(ValidationError) as sharded:
+        parallel.load_openapi(data, jobs=2)
+    assert sharded.value.messages == serial.value.messages == {"components": {"bogus": ["Unknown field."]}}
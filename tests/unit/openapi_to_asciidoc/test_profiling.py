@@ -0,0 +1,72 @@
+# Copyright © LFV
+
+import io
+import json
+
+import pytest
+
+from openapi_to_asciidoc import profiling, render
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+
+@pytest.fixture
+def profiler():
+    yield profiling.enable()
+    profiling.disable()
+
+
+def test_phases(profiler):
+    with open("tests/resources/test.json") as f:
+        with profiling.phase("parse"):
+            data = json.load(f)
+
+    with profiling.phase("load"):
+        schema = OpenApiSchema().load(data)
+    schema.result
+
+    with profiling.phase("load"):
+        with profiling.phase("parse"):
+            bytearray(10**6)
+
+    output = io.StringIO()
+    profiler.write_report(output)
+    report = json.loads(output.getvalue())
+
+    assert [phase["name"] for phase in report["phases"]] == ["parse", "load", "render", "format_output"]
+    load = report["phases"][1]
+    assert load["peak_memory_bytes"] >= 10**6
+    assert 0 < load["wall_seconds"] <= report["total"]["wall_seconds"]
+    assert report["total"]["peak_memory_bytes"] >= load["peak_memory_bytes"]
+
+
+def test_disabled():
+    assert isinstance(profiling._profiler, profiling.NullProfiler)
+    with profiling.phase("parse"):
+        pass
+
+
+def test_templates():
+    with open("tests/resources/test.json") as f:
+        schema = OpenApiSchema().load(json.load(f))
+
+    template_profiler = profiling.enable_templates()
+    render.configure()
+    try:
+        template_profiler.label_objects(schema)
+        schema.render()
+    finally:
+        profiling.disable_templates()
+        render.configure()
+
+    templates = template_profiler.templates
+    assert templates["openapi_obj.j2"]["calls"] == 1
+    assert templates["schema_obj.j2"]["calls"] > 1
+    total = templates["openapi_obj.j2"]["inclusive_seconds"]
+    assert sum(stats["exclusive_seconds"] for stats in templates.values()) == pytest.approx(total)
+    assert all(stats["inclusive_seconds"] <= total for stats in templates.values())
+    assert "paths /pets" in template_profiler.objects
+    assert "components.schemas Pet" in template_profiler.objects
+
+    report = template_profiler.report(top=3).splitlines()
+    assert report[1].startswith(max(templates, key=lambda name: templates[name]["exclusive_seconds"]))
+    assert len(report) == 9
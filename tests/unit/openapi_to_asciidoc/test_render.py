@@ -0,0 +1,148 @@
+# Copyright © LFV
+
+import io
+import json
+import os
+
+from openapi_to_asciidoc import render, resolve
+from openapi_to_asciidoc.objects import OpenApiSchema, SchemaObjectSchema
+
+
+def load_test_spec():
+    with open("tests/resources/test.json") as json_file:
+        return json.load(json_file)
+
+
+def test_environment_is_shared():
+    render.configure()
+
+    assert render.get_environment() is render.get_environment()
+
+
+def test_template_cache_dir(tmp_path):
+    cache_dir = tmp_path / "cache"
+    render.configure(template_cache_dir=str(cache_dir), compiled_templates_dir=None)
+    try:
+        first = OpenApiSchema().load(load_test_spec()).result
+        assert len(os.listdir(cache_dir)) > 0
+
+        # a new environment loads the compiled templates from the cache and renders the same output
+        render.configure(template_cache_dir=str(cache_dir), compiled_templates_dir=None)
+        assert OpenApiSchema().load(load_test_spec()).result == first
+    finally:
+        render.configure()
+
+
+def test_precompiled_templates(tmp_path):
+    source = OpenApiSchema().load(load_test_spec()).result
+
+    render.compile_templates(target=tmp_path)
+    render.configure(compiled_templates_dir=tmp_path)
+    try:
+        assert render.get_environment().get_template("openapi_obj.j2").filename.endswith(".py")
+        assert OpenApiSchema().load(load_test_spec()).result == source
+    finally:
+        render.configure()
+
+
+def test_stale_precompiled_templates(tmp_path):
+    render.compile_templates(target=tmp_path)
+    manifest = json.loads((tmp_path / render.MANIFEST_FILE).read_text())
+    manifest["templates"]["openapi_obj.j2"] = "changed"
+    (tmp_path / render.MANIFEST_FILE).write_text(json.dumps(manifest))
+
+    render.configure(compiled_templates_dir=tmp_path)
+    try:
+        assert render.get_environment().get_template("openapi_obj.j2").filename.endswith(".j2")
+        assert render.get_environment().get_template("paths_obj.j2").filename.endswith(".py")
+    finally:
+        render.configure()
+
+
+def test_format_output_stream():
+    text = "a\n\n\n\nb\nc\n\n\n" + "\n" * 7 + "d\n\n" + "\n\ne\n\n\n"
+    chunks = [text[i:][:3] for i in range(0, len(text), 3)]
+
+    for chunk_size in (1, 2, 5, 1000):
+        assert "".join(render.format_output_stream(chunks, chunk_size=chunk_size)) == render.format_output(text)
+
+
+def test_stream_object():
+    open_api = OpenApiSchema().load(load_test_spec())
+    output = io.StringIO()
+
+    render.stream_object(open_api, "openapi_obj.j2", output, chunk_size=16)
+
+    assert output.getvalue() == open_api.result
+
+
+def test_fragment_cache():
+    expected = OpenApiSchema().load(load_test_spec()).result
+
+    render.configure(fragment_cache_size=1000)
+    try:
+        assert OpenApiSchema().load(load_test_spec()).result == expected
+        fragment_cache = render.fragment_cache()
+        assert fragment_cache.hits > 0
+        assert len(fragment_cache.fragments) == fragment_cache.misses
+    finally:
+        render.configure()
+
+
+def test_fragment_cache_identical_objects():
+    render.configure(fragment_cache_size=2)
+    try:
+        fragment_cache = render.fragment_cache()
+        first, copy, other = (
+            SchemaObjectSchema().load(data) for data in ({"type": "string"}, {"type": "string"}, {"type": "integer"})
+        )
+
+        assert fragment_cache.key(first, "schema_obj.j2") == fragment_cache.key(copy, "schema_obj.j2")
+        assert fragment_cache.key(first, "schema_obj.j2") != fragment_cache.key(first, "xml_obj.j2")
+        assert fragment_cache.key(first, "schema_obj.j2") != fragment_cache.key(other, "schema_obj.j2")
+
+        render.render_fragment(first, "schema_obj.j2")
+        render.render_fragment(copy, "schema_obj.j2")
+        assert (fragment_cache.hits, fragment_cache.misses) == (1, 1)
+
+        # the least recently used fragment is dropped when the cache is full
+        render.render_fragment(first, "xml_obj.j2")
+        render.render_fragment(other, "schema_obj.j2")
+        render.render_fragment(first, "schema_obj.j2")
+        assert (fragment_cache.hits, fragment_cache.misses) == (1, 4)
+    finally:
+        render.configure()
+
+
+def test_fragment_cache_resolved_references():
+    def load(pet_type):
+        open_api = OpenApiSchema().load(
+            {
+                "openapi": "3.1.0",
+                "paths": {
+                    "/pets": {
+                        "get": {
+                            "responses": {
+                                "200": {
+                                    "description": "A pet",
+                                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Pet"}}},
+                                }
+                            }
+                        }
+                    }
+                },
+                "components": {"schemas": {"Pet": {"type": pet_type}}},
+            }
+        )
+        resolve.resolve_references(open_api)
+        return open_api
+
+    expected = [load(pet_type).result for pet_type in ("object", "string")]
+    assert expected[0] != expected[1]
+
+    # the same reference in another document is resolved to another schema
+    render.configure(fragment_cache_size=1000)
+    try:
+        assert [load(pet_type).result for pet_type in ("object", "string")] == expected
+    finally:
+        render.configure()
@@ -0,0 +1,70 @@
+# Copyright © LFV
+
+from openapi_to_asciidoc import resolve
+from openapi_to_asciidoc.objects import OpenApi, OpenApiSchema
+
+
+def load(schemas: dict, content_schema: dict) -> OpenApi:
+    operation = {"responses": {"200": {"content": {"application/json": {"schema": content_schema}}}}}
+    return OpenApiSchema().load(
+        {
+            "openapi": "3.1.0",
+            "info": {"title": "Test", "version": "1"},
+            "paths": {"/pets": {"get": operation}},
+            "components": {"schemas": schemas},
+        }
+    )
+
+
+def content_schema(open_api: OpenApi):
+    return open_api.paths.paths["/pets"].get.responses["200"].content["application/json"].schema_object
+
+
+def test_shared_target():
+    schemas = {
+        "Pet": {"type": "object", "properties": {"owner": {"$ref": "#/components/schemas/Owner"}}},
+        "Owner": {"type": "string"},
+        "Alias": {"$ref": "#/components/schemas/Pet"},
+    }
+    open_api = load(schemas, {"$ref": "#/components/schemas/Alias"})
+
+    resolver = resolve.resolve_references(open_api)
+
+    pet = open_api.components.schemas["Pet"]
+    assert content_schema(open_api).resolved is pet
+    assert open_api.components.schemas["Alias"].resolved is pet
+    assert pet.properties["owner"].resolved is open_api.components.schemas["Owner"]
+    assert resolver.targets["#/components/schemas/Alias"] is pet
+
+
+def test_nested_pointer():
+    schemas = {"Pet": {"type": "object", "properties": {"a/b": {"type": "string"}}}}
+    open_api = load(schemas, {"$ref": "#/components/schemas/Pet/properties/a~1b"})
+
+    resolve.resolve_references(open_api)
+
+    assert content_schema(open_api).resolved is open_api.components.schemas["Pet"].properties["a/b"]
+
+
+def test_unresolvable():
+    schemas = {
+        "A": {"$ref": "#/components/schemas/B"},
+        "B": {"$ref": "#/components/schemas/A"},
+        "External": {"$ref": "other.json#/Pet"},
+    }
+    open_api = load(schemas, {"$ref": "#/components/schemas/Missing"})
+
+    resolve.resolve_references(open_api)
+
+    assert content_schema(open_api).resolved is None
+    assert open_api.components.schemas["A"].resolved is None
+    assert open_api.components.schemas["B"].resolved is None
+    assert not hasattr(open_api.components.schemas["External"], "resolved")
+
+
+def test_render_resolved_schema():
+    open_api = load({"Pet": {"type": "object", "description": "A pet"}}, {"$ref": "#/components/schemas/Pet"})
+
+    resolve.resolve_references(open_api)
+
+    assert "_Resolved schema_\n\ntype: object\n\ndescription: A pet" in open_api.result
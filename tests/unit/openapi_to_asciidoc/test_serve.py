@@ -0,0 +1,110 @@
+# Copyright © LFV
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from openapi_to_asciidoc import render, resolve, serve
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+
+@pytest.fixture
+def service():
+    service = serve.ConversionService(workers=1, queue_size=1, cache_size=10**6)
+    server = serve.create_server("127.0.0.1", 0, service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    service.port = server.server_address[1]
+    yield service
+    server.shutdown()
+    server.server_close()
+
+
+def request(service, method: str, path: str, body: bytes = None, headers: dict = None) -> tuple:
+    connection = http.client.HTTPConnection("127.0.0.1", service.port)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.read().decode("utf-8")
+    finally:
+        connection.close()
+
+
+def test_convert(service):
+    with open("tests/resources/test.json", "rb") as f:
+        body = f.read()
+    expected = OpenApiSchema().load(json.loads(body)).result
+
+    assert request(service, "POST", "/convert", body) == (200, expected)
+    assert request(service, "POST", "/convert", body) == (200, expected)
+    status, text = request(service, "POST", "/convert?include-paths=/pets", body)
+    assert status == 200 and "/labs/" not in text
+
+    health = json.loads(request(service, "GET", "/health")[1])
+    assert health["converted"] == 2
+    assert health["cache"]["hits"] == 1
+
+
+def test_errors(service):
+    assert request(service, "POST", "/convert", b'{"openapi": ')[0] == 400
+    assert request(service, "POST", "/convert?unknown=1", b"{}")[0] == 400
+    status, text = request(service, "POST", "/convert", b'{"openapi": 3}')
+    assert status == 422
+    assert json.loads(text) == {"error": {"openapi": ["Not a valid string."]}}
+    for body in (b"[]", b'"openapi"', b"1"):
+        assert request(service, "POST", "/convert", body) == (
+            422,
+            '{"error": "The specification must be a JSON object"}',
+        )
+    assert request(service, "POST", "/convert", b"", {"Content-Length": "-1"}) == (
+        400,
+        '{"error": "Content-Length can\'t be negative"}',
+    )
+
+    held = 0
+    while service.admitted.acquire(blocking=False):  # as if other requests were being converted and waiting
+        held += 1
+    try:
+        assert request(service, "POST", "/convert", b"{}")[0] == 503
+    finally:
+        for _ in range(held):
+            service.admitted.release()
+    assert json.loads(request(service, "GET", "/health")[1])["rejected"] == 1
+
+
+def test_unknown_fields_of_each_request(service):
+    info = {"title": "Pets", "version": "1.0", "bogus": 1}
+    spec = {"openapi": "3.1.0", "info": info, "paths": {"/pets": {"bogus": 2}}}
+    expected = (422, json.dumps({"error": {"info": {"bogus": ["Unknown field."]}}}))
+    body = json.dumps(spec).encode("utf-8")
+
+    assert request(service, "POST", "/convert", body) == expected
+    assert request(service, "POST", "/convert", body) == expected
+
+
+def test_fragment_cache_of_each_request(service):
+    def spec(pet_type):
+        content = {"application/json": {"schema": {"$ref": "#/components/schemas/Pet"}}}
+        responses = {"200": {"description": "A pet", "content": content}}
+        return {
+            "openapi": "3.1.0",
+            "paths": {"/pets": {"get": {"responses": responses}}},
+            "components": {"schemas": {"Pet": {"type": pet_type}}},
+        }
+
+    expected = []
+    for pet_type in ("object", "string"):
+        open_api = OpenApiSchema().load(spec(pet_type))
+        resolve.resolve_references(open_api)
+        expected.append((200, open_api.result))
+
+    # the fragments are shared by all requests, the same reference is resolved to another schema in each
+    render.configure(fragment_cache_size=1000)
+    try:
+        for pet_type, response in zip(("object", "string"), expected):
+            body = json.dumps(spec(pet_type)).encode("utf-8")
+            assert request(service, "POST", "/convert?resolve-refs=true", body) == response
+    finally:
+        render.configure()
@@ -0,0 +1,69 @@
+# Copyright © LFV
+
+import json
+import os
+import re
+
+from openapi_to_asciidoc import split
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+
+def read_spec() -> dict:
+    with open("tests/resources/test.json") as f:
+        return json.load(f)
+
+
+def expand(master) -> str:
+    text = master.read_text()
+    text = re.sub(r"include::(.*)\[\]", lambda match: (master.parent / match.group(1)).read_text(), text)
+    return re.sub(r"\n{2,}", "\n\n", text).strip()
+
+
+def test_write_split_same_content(tmp_path):
+    data = read_spec()
+    master = tmp_path / "api.adoc"
+
+    written, unchanged = split.write_split(OpenApiSchema().load(data), data, master, by="path")
+
+    assert unchanged == 0
+    assert written == len(list(tmp_path.rglob("*.adoc")))
+    assert (tmp_path / "api" / "paths" / "pets.adoc").read_text().startswith("=== /pets\n")
+    # loading removes the specification extensions from the data, load it again
+    assert expand(master) == re.sub(r"\n{2,}", "\n\n", OpenApiSchema().load(read_spec()).result).strip()
+
+
+def test_write_split_only_changed(tmp_path):
+    data = read_spec()
+    master = tmp_path / "api.adoc"
+    split.write_split(OpenApiSchema().load(data), data, master, by="path")
+    for path in tmp_path.rglob("*.adoc"):
+        os.utime(path, (0, 0))
+
+    data = read_spec()
+    data["paths"]["/pets"]["get"]["summary"] = "Changed"
+    del data["tags"]
+    written, _ = split.write_split(OpenApiSchema().load(data), data, master, by="path")
+
+    assert written == 2  # the changed path, and the master file that no longer includes the tags
+    assert sorted(path.name for path in tmp_path.rglob("*.adoc") if path.stat().st_mtime > 0) == [
+        "api.adoc",
+        "pets.adoc",
+    ]
+    assert not (tmp_path / "api" / "tags.adoc").exists()
+
+
+def test_path_groups_by_tag():
+    data = {
+        "paths": {
+            "/a": {"get": {"tags": ["one"]}},
+            "/b": {"parameters": []},
+            "/c": {"put": {"tags": ["two", "one"]}, "get": {"tags": ["one"]}},
+        }
+    }
+
+    assert split.path_groups(["/a", "/b", "/c"], data, by="tag") == {"one": ["/a", "/c"], "default": ["/b"]}
+    assert split.unique_slugs(["/pets/{id}", "/pets/{id}/", "/"]) == {
+        "/pets/{id}": "pets-id",
+        "/pets/{id}/": "pets-id-2",
+        "/": "root",
+    }
@@ -0,0 +1,109 @@
+# Copyright © LFV
+
+import copy
+
+from openapi_to_asciidoc import subset
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+SPEC = {
+    "openapi": "3.1.0",
+    "info": {"title": "Pets", "version": "1.0"},
+    "tags": [{"name": "pets"}, {"name": "store"}],
+    "paths": {
+        "/pets": {
+            "parameters": [{"$ref": "#/components/parameters/limit"}],
+            "get": {
+                "tags": ["pets"],
+                "operationId": "listPets",
+                "security": [{"api_key": []}],
+                "responses": {"200": {"$ref": "#/components/responses/Pets"}},
+            },
+            "post": {"tags": ["store"], "operationId": "addPet"},
+        },
+        "/orders": {"get": {"tags": ["store"], "operationId": "listOrders"}},
+    },
+    "components": {
+        "schemas": {
+            "Pet": {"properties": {"owner": {"$ref": "#/components/schemas/a~1b"}}},
+            "a/b": {"type": "string"},
+            "Order": {"type": "object"},
+        },
+        "parameters": {"limit": {"name": "limit", "in": "query"}},
+        "responses": {
+            "Pets": {
+                "description": "Pets",
+                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Pet"}}},
+            }
+        },
+        "securitySchemes": {"api_key": {"type": "apiKey", "name": "key", "in": "header"}, "oauth": {"type": "http"}},
+        "x-team": "pets",
+    },
+}
+
+
+def test_subset_by_tag():
+    spec = copy.deepcopy(SPEC)
+
+    pruned = subset.subset(spec, subset.Selection(tags=["pets"]))
+
+    assert spec == SPEC
+    assert list(pruned["paths"]) == ["/pets"]
+    assert list(pruned["paths"]["/pets"]) == ["parameters", "get"]
+    assert pruned["tags"] == [{"name": "pets"}]
+    components = pruned["components"]
+    assert list(components["schemas"]) == ["Pet", "a/b"]
+    assert list(components["parameters"]) == ["limit"]
+    assert list(components["securitySchemes"]) == ["api_key"]
+    assert components["x-team"] == "pets"
+    OpenApiSchema().load(pruned)
+
+
+def test_filters_combine():
+    selection = subset.Selection(paths=["/*"], operations=["addPet", "listOrders"], tags=["store"])
+
+    pruned = subset.subset(copy.deepcopy(SPEC), selection)
+
+    assert {path: list(item) for path, item in pruned["paths"].items()} == {
+        "/pets": ["parameters", "post"],
+        "/orders": ["get"],
+    }
+    assert list(pruned["components"]["parameters"]) == ["limit"]
+    assert pruned["components"]["schemas"] == {}
+    assert not subset.Selection()
+
+
+def test_path_item_reference():
+    spec = copy.deepcopy(SPEC)
+    spec["paths"]["/owners"] = {"$ref": "#/components/pathItems/Owners"}
+    spec["components"]["pathItems"] = {
+        "Owners": {
+            "get": {
+                "tags": ["owners"],
+                "responses": {"200": {"$ref": "#/components/responses/Pets"}},
+            }
+        },
+        "Unused": {"get": {"tags": ["owners"]}},
+    }
+    spec["tags"].append({"name": "owners"})
+
+    pruned = subset.subset(spec, subset.Selection(paths=["/owners"]))
+
+    assert pruned["paths"] == {"/owners": {"$ref": "#/components/pathItems/Owners"}}
+    assert pruned["tags"] == [{"name": "owners"}]
+    assert list(pruned["components"]["pathItems"]) == ["Owners"]
+    assert list(pruned["components"]["responses"]) == ["Pets"]
+    assert list(pruned["components"]["schemas"]) == ["Pet", "a/b"]
+    assert subset.subset(spec, subset.Selection(tags=["pets"]))["components"]["pathItems"] == {}
+
+
+def test_reference_into_component():
+    spec = copy.deepcopy(SPEC)
+    spec["paths"]["/orders"]["get"]["parameters"] = [
+        {"name": "owner", "in": "query", "schema": {"$ref": "#/components/schemas/Pet/properties/owner"}}
+    ]
+
+    pruned = subset.subset(spec, subset.Selection(operations=["listOrders"]))
+
+    assert list(pruned["components"]["schemas"]) == ["Pet", "a/b"]
+    assert subset.component_key("#/components/schemas/Pet/properties/owner") == ("schemas", "Pet")
+    assert subset.component_key("#/components/schemas") is None
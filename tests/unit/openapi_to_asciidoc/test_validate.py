@@ -0,0 +1,93 @@
+# Copyright © LFV
+
+import copy
+import json
+from operator import itemgetter
+
+import pytest
+from marshmallow import ValidationError
+
+from openapi_to_asciidoc import validate
+from openapi_to_asciidoc.objects import OpenApiSchema
+
+
+def invalid_spec() -> dict:
+    with open("tests/resources/test.json") as f:
+        spec = json.load(f)
+    spec["info"]["title"] = 3
+    spec["paths"]["pets"] = {}
+    spec["paths"]["/a/{id}"] = {
+        "get": {
+            "parameters": [{"name": 1}],
+            "responses": {"200": {"content": {"application/json": {"schema": {"properties": {"b": {"type": 1}}}}}}},
+        }
+    }
+    spec["components"]["schemas"]["Bad"] = {"allOf": [{"required": 3}]}
+    spec["webhooks"] = {"hook": {"post": {"tags": [1]}}}
+    return spec
+
+
+def test_errors():
+    errors = validate.validate(invalid_spec())
+
+    assert errors == [
+        {"pointer": "/info/title", "message": "Not a valid string."},
+        {"pointer": "/paths/pets", "message": "Invalid value."},
+        {"pointer": "/paths/~1a~1{id}/get/parameters/0/name", "message": "Not a valid string."},
+        {
+            "pointer": "/paths/~1a~1{id}/get/responses/200/content/application~1json/schema/properties/b/type",
+            "message": "Not a valid string.",
+        },
+        {"pointer": "/webhooks/hook/post/tags/0", "message": "Not a valid string."},
+        {"pointer": "/components/schemas/Bad/allOf/0/required", "message": "Not a valid list."},
+    ]
+
+    # the same errors as loading the whole specification at once
+    with pytest.raises(ValidationError) as error:
+        OpenApiSchema().load(invalid_spec())
+    messages = validate.error_list(error.value.messages, OpenApiSchema())
+    assert sorted(messages, key=itemgetter("pointer")) == sorted(errors, key=itemgetter("pointer"))
+
+
+def test_shards():
+    spec = invalid_spec()
+    spec["components"]["schemas"].update((f"S{index}", {"type": index % 2 or "string"}) for index in range(200))
+
+    errors = validate.validate(copy.deepcopy(spec), jobs=2)
+
+    assert errors == validate.validate(spec)
+    assert {"pointer": "/components/schemas/S1/type", "message": "Not a valid string."} in errors
+
+
+def test_files(tmp_path):
+    (tmp_path / "broken.json").write_text('{"openapi": ')
+
+    report = validate.validate_files(["tests/resources/test.json", str(tmp_path / "broken.json")])
+
+    assert not report["valid"]
+    assert report["specifications"][0] == {"file": "tests/resources/test.json", "valid": True, "errors": []}
+    assert report["specifications"][1]["errors"][0]["pointer"] == ""
+    assert report["specifications"][1]["errors"][0]["message"].startswith("JSONDecodeError")
+
+
+def test_unknown_fields(tmp_path):
+    spec = {
+        "openapi": "3.1.0",
+        "info": {"title": "Unknown", "version": "1.0", "bogus": 1},
+        "paths": {"/a": {"bogus": 2}, "/b": {"get": {"bogus": 3}}},
+        "components": {"responses": {"A": {"description": "A", "bogus": 4}}, "bogus": 5},
+    }
+    for name in ("first.json", "second.json"):
+        (tmp_path / name).write_text(json.dumps(spec))
+
+    report = validate.validate_files([str(tmp_path / "first.json"), str(tmp_path / "second.json")])
+
+    # only the objects that a document has one of reject unknown fields, the same as loading it to convert it
+    expected = [
+        {"pointer": "/info/bogus", "message": "Unknown field."},
+        {"pointer": "/components/bogus", "message": "Unknown field."},
+    ]
+    assert [specification["errors"] for specification in report["specifications"]] == [expected, expected]
+    with pytest.raises(ValidationError) as error:
+        OpenApiSchema().load(spec)
+    assert validate.error_list(error.value.messages, OpenApiSchema()) == expected
@@ -0,0 +1,91 @@
+# Copyright © LFV
+
+import io
+import json
+import shutil
+
+from openapi_to_asciidoc import cache, watch
+from openapi_to_asciidoc.objects import OpenApi, OpenApiSchema
+
+
+def load(data: dict):
+    return OpenApiSchema().load(data)
+
+
+def test_convert_changes(tmp_path):
+    spec = tmp_path / "openapi.json"
+    output = tmp_path / "out" / "openapi.adoc"
+    shutil.copy("tests/resources/test.json", spec)
+    fragments = cache.MemoryCache()
+    log = io.StringIO()
+
+    assert watch.convert(spec, output, fragments, load=load, log=log)
+    assert output.read_text() == load(json.loads(spec.read_text())).result
+
+    data = json.loads(spec.read_text())
+    data["paths"]["/pets"]["get"]["summary"] = "Changed"
+    spec.write_text(json.dumps(data))
+
+    assert watch.convert(spec, output, fragments, load=load, log=log)
+    assert output.read_text() == load(data).result
+    assert "(1 rendered, " in log.getvalue().splitlines()[-1]
+
+
+def test_convert_invalid(tmp_path):
+    spec = tmp_path / "openapi.json"
+    output = tmp_path / "openapi.adoc"
+    spec.write_text('{"openapi": ')
+    log = io.StringIO()
+
+    assert not watch.convert(spec, output, cache.MemoryCache(), load=load, log=log)
+    assert not output.exists()
+    assert log.getvalue().startswith(f"Can't convert {spec}")
+
+
+def test_convert_invalid_then_valid(tmp_path):
+    spec = tmp_path / "openapi.json"
+    output = tmp_path / "openapi.adoc"
+    fragments = cache.MemoryCache()
+    log = io.StringIO()
+
+    spec.write_text(json.dumps({"openapi": 3}))
+    assert not watch.convert(spec, output, fragments, load=load, log=log)
+    assert "'openapi': ['Not a valid string.']" in log.getvalue()
+
+    spec.unlink()
+    assert not watch.convert(spec, output, fragments, load=load, log=log)
+
+    shutil.copy("tests/resources/test.json", spec)
+    assert watch.convert(spec, output, fragments, load=load, log=log)
+    assert output.read_text() == load(json.loads(spec.read_text())).result
+
+
+def test_convert_render_error(tmp_path, monkeypatch):
+    spec = tmp_path / "openapi.json"
+    output = tmp_path / "openapi.adoc"
+    shutil.copy("tests/resources/test.json", spec)
+    fragments = cache.MemoryCache()
+    log = io.StringIO()
+
+    def render(self):
+        raise TypeError("can't render")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(OpenApi, "render", render)
+        assert not watch.convert(spec, output, fragments, load=load, log=log)
+    assert not output.exists()
+    assert log.getvalue() == f"Can't convert {spec}: TypeError: can't render\n"
+
+    # still watching, the next change is converted
+    assert watch.convert(spec, output, fragments, load=load, log=log)
+    assert output.read_text() == load(json.loads(spec.read_text())).result
+
+
+def test_file_state(tmp_path):
+    spec = tmp_path / "openapi.json"
+    assert watch.file_state(spec) is None
+
+    spec.write_text("{}")
+    state = watch.file_state(spec)
+    spec.write_text("{} ")
+    assert watch.file_state(spec) != state